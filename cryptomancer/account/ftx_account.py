@@ -1,10 +1,8 @@
 import ftx
 from typing import Optional, List
 
-import pandas
-
 from cryptomancer.account import Account
-from cryptomancer.execution_handler.order_status import OrderStatus
+from cryptomancer.execution_handler.order_status import OrderStatus, from_exchange_order
 
 from cryptomancer.account.position import Position
 
@@ -51,21 +49,7 @@ class FtxAccount(Account):
 
     def get_open_orders(self, market: Optional[str] = None) -> List[OrderStatus]:
         open_orders = self.account.get_open_orders(market = market)
-        order_statuses = []
-        for order_status in open_orders:
-            os = OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = order_status['type'],
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = order_status['filledSize'],
-                            average_fill_price = order_status['avgFillPrice'],
-                            status = order_status['status'])
-
-            order_statuses.append(os)
-
-        return order_statuses
+        return [from_exchange_order(order_status) for order_status in open_orders]
 
     def place_order(self, market: str, side: str, price: float, size: float, type: str = 'limit', reduce_only: bool = False, 
                         ioc: bool = False, post_only: bool = False, client_id: Optional[str] = None) -> OrderStatus:
@@ -73,15 +57,7 @@ class FtxAccount(Account):
         order_status = self.account.place_order(market = market, side = side, price = price, size = size, type = type, 
                                  reduce_only = reduce_only, ioc = ioc, post_only = post_only, client_id = client_id)
         
-        return OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = type,
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = order_status['filledSize'],
-                            average_fill_price = None,
-                            status = order_status['status'])
+        return from_exchange_order(order_status, type = type, average_fill_price = None)
 
 
     def place_conditional_order(self, market: str, side: str, size: float, type: str, limit_price: Optional[float] = None, 
@@ -92,28 +68,12 @@ class FtxAccount(Account):
                                 limit_price = limit_price, reduce_only = reduce_only, cancel = cancel,
                                 trigger_price = trigger_price, trail_value = trail_value)
 
-        return OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = type,
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = None,
-                            average_fill_price = None,
-                            status = order_status['status'])
+        return from_exchange_order(order_status, type = type, filled_size = None, average_fill_price = None)
 
     def modify_order(self, order_id: str, price: Optional[float], size: Optional[float] = None) -> OrderStatus:
         order_status = self.account.modify_order(order_id, price = price, size = size)
 
-        return OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = order_status['type'],
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = order_status['filledSize'],
-                            average_fill_price = order_status['avgFillPrice'],
-                            status = order_status['status'])
+        return from_exchange_order(order_status)
 
     def cancel_order(self, order_id: str) -> dict:
         return self.account.cancel_order(order_id = order_id)
@@ -121,15 +81,7 @@ class FtxAccount(Account):
     def get_order_status(self, order_id: str) -> OrderStatus:
         order_status = self.account.get_order_status(existing_order_id = order_id)
 
-        return OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = order_status['type'],
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = order_status['filledSize'],
-                            average_fill_price = order_status['avgFillPrice'],
-                            status = order_status['status'])
+        return from_exchange_order(order_status)
 
     def get_conditional_order_status(self, market: str, order_id: str) -> OrderStatus:
         order_statuses = self.account.get_conditional_orders(market)
@@ -147,15 +99,7 @@ class FtxAccount(Account):
         
         order_status = order_status[0]
 
-        return OrderStatus(order_id = order_status['id'],
-                            created_time = pandas.Timestamp(order_status['createdAt']).to_pydatetime(),
-                            market = order_status['market'],
-                            type = order_status['type'],
-                            side = order_status['side'],
-                            size = order_status['size'],
-                            filled_size = order_status['filledSize'],
-                            average_fill_price = order_status['avgFillPrice'],
-                            status = order_status['status'])
+        return from_exchange_order(order_status)
 
     def get_deposit_address(self, ticker: str, method: Optional[str] = None) -> dict:
         return self.account.get_deposit_address(ticker = ticker, method = method)
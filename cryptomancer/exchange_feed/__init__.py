@@ -1,23 +1,125 @@
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Optional, Tuple, Union
+
+import numpy
+
+from cryptomancer.exchange_feed.depth_view import DepthView
+from cryptomancer.exchange_feed.orderbook import BookAnalytics
+from cryptomancer.exchange_feed.feed_queue import FeedQueue
+from cryptomancer.exchange_feed.feed_callback import FeedCallback
+
+# seed_bars accepts a DataFrame, but feeds do not otherwise need pandas
+if TYPE_CHECKING:
+    import pandas
 
 class ExchangeFeed(object):
     def __init__(self):
         pass
 
+    def subscribe_many(self, markets: Iterable[str], channels: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def subscribe_queue(self, channel: str, markets: Optional[Iterable[str]] = None, capacity: int = 10000) -> FeedQueue:
+        raise NotImplementedError
+
+    def unsubscribe_queue(self, queue: FeedQueue) -> None:
+        raise NotImplementedError
+
+    def on_ticker(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        raise NotImplementedError
+
+    def on_book(self, market: str, fn: Callable[[str, DepthView], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        raise NotImplementedError
+
+    def on_trade(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        raise NotImplementedError
+
+    def on_fill(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        raise NotImplementedError
+
+    def on_order(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        raise NotImplementedError
+
+    def remove_callback(self, callback: FeedCallback) -> None:
+        raise NotImplementedError
+
     def get_orders(self) -> Dict[int, Dict]:
         raise NotImplementedError
 
+    def get_orders_changed_since(self, cursor: int = 0) -> Tuple[Dict[int, Dict], int]:
+        raise NotImplementedError
+
+    def get_orders_cursor(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def get_fills_cursor(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def wait_for_order(self, order_id: int, predicate: Callable[[Dict], bool], 
+                        timeout: Optional[float] = None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def has_order_updates(self) -> bool:
+        """
+            Whether this feed carries the account's order updates, i.e. whether
+            `wait_for_order` and the other order methods are implemented.
+        """
+        return False
+
     def get_fills(self) -> List[Dict]:
         raise NotImplementedError
 
-    def get_bid_offer(self, market: str) -> List[Dict]:
+    def get_fills_since(self, cursor: int = 0) -> Tuple[List[Dict], int]:
+        raise NotImplementedError
+
+    def get_fills_array(self, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        raise NotImplementedError
+
+    def get_trades(self, market: str) -> List[Dict]:
+        raise NotImplementedError
+
+    def get_trades_array(self, market: str, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        raise NotImplementedError
+
+    def get_bars(self, market: str, resolution: Union[str, int] = '1m', n: int = 60) -> numpy.ndarray:
+        raise NotImplementedError
+
+    def seed_bars(self, market: str, resolution: Union[str, int], bars: Union[numpy.ndarray, 'pandas.DataFrame']) -> None:
+        raise NotImplementedError
+
+    def get_bid_offer(self, market: str) -> Dict:
+        raise NotImplementedError
+
+    def get_book_analytics(self, market: str) -> Optional[BookAnalytics]:
+        raise NotImplementedError
+
+    def set_tick_size(self, market: str, tick_size: float) -> None:
         raise NotImplementedError
 
     def get_ticker(self, market: str) -> Dict:
         raise NotImplementedError
 
+    def get_sequence(self, market: str, channel: str = 'ticker') -> int:
+        raise NotImplementedError
+
+    def wait_for_update(self, market: str, channel: str = 'ticker', after_seq: Optional[int] = None,
+                            timeout: Optional[float] = None) -> int:
+        raise NotImplementedError
+
     def get_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
         raise NotImplementedError
         
     def get_cumulative_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
+        raise NotImplementedError
+
+    def get_depth(self, market: str) -> DepthView:
+        raise NotImplementedError
+
+    def get_live_depth(self, market: str) -> Optional[DepthView]:
         raise NotImplementedError
\ No newline at end of file
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import deque
+from threading import Thread, Lock
+from typing import Deque, Optional
+
+import websockets
+
+from cryptomancer.exchange_feed.websocket_manager import WebsocketManager
+
+
+class AsyncWebsocketManager(WebsocketManager):
+    """
+        asyncio-based alternative to WebsocketManager with the same
+        `_get_url` / `_on_message` / `send_json` contract.
+
+        Each connection runs as a task on an event loop rather than on its own
+        thread.  Unless a loop is assigned, all managers share a single loop
+        running in one background thread, so feeding many markets costs one
+        thread in total.  `send` never blocks: messages are queued and written
+        in order once the socket is connected.  As with WebsocketManager, what
+        is still queued when a connection drops is discarded and `_on_open` is
+        called on every (re)connect to restore the session.
+    """
+    _RECONNECT_DELAY_S = 0.5
+
+    _shared_loop: Optional[asyncio.AbstractEventLoop] = None
+    _shared_loop_lock = Lock()
+
+    def __init__(self):
+        super().__init__()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._pending: Deque[str] = deque()
+        self._pending_event: Optional[asyncio.Event] = None
+
+    @classmethod
+    def _get_shared_loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._shared_loop_lock:
+            if cls._shared_loop is None:
+                loop = asyncio.new_event_loop()
+                loop_thread = Thread(target = loop.run_forever)
+                loop_thread.daemon = True
+                loop_thread.start()
+                cls._shared_loop = loop
+
+        return cls._shared_loop
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = self._get_shared_loop()
+        return self._loop
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._get_loop()
+        except RuntimeError:
+            return False
+
+    def _call_in_loop(self, f, *args) -> None:
+        if self._in_loop():
+            f(*args)
+        else:
+            self._get_loop().call_soon_threadsafe(f, *args)
+
+    async def _run_in_loop(self, coroutine):
+        # lets callers on any event loop (or the manager's own) await
+        # coroutines that touch the manager's loop-bound state
+        if self._in_loop():
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()))
+
+    def _ensure_started(self) -> None:
+        # must be called from within the manager's loop
+        if self._task is None:
+            self._connected = asyncio.Event()
+            self._pending_event = asyncio.Event()
+            self._task = self._get_loop().create_task(self._run())
+
+    def _enqueue(self, message: str) -> None:
+        self._ensure_started()
+        self._pending.append(message)
+        self._pending_event.set()
+
+    def send(self, message):
+        self._call_in_loop(self._enqueue, message)
+
+    async def wait_connected(self) -> None:
+        self._ensure_started()
+        await self._connected.wait()
+
+    def connect(self):
+        if self._in_loop():
+            self._ensure_started()
+        else:
+            asyncio.run_coroutine_threadsafe(self.wait_connected(), self._get_loop()).result()
+
+    async def _write(self, ws) -> None:
+        while True:
+            while self._pending:
+                await ws.send(self._pending.popleft())
+
+            self._pending_event.clear()
+            await self._pending_event.wait()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with websockets.connect(self._get_url(), max_size = None) as ws:
+                    self.ws = ws
+                    self._pending.clear()
+                    self._on_open(ws)
+                    self._connected.set()
+
+                    writer = self._get_loop().create_task(self._write(ws))
+                    try:
+                        async for message in ws:
+                            self._on_message(ws, message)
+                    finally:
+                        writer.cancel()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception:
+                # mirror WebsocketManager: any connection or callback
+                # error results in a reconnect
+                pass
+
+            finally:
+                dropped = self.ws is not None
+                if dropped:
+                    self._reconnect_count += 1
+                    self._disconnected_at = time.time()
+                self.ws = None
+                self._connected.clear()
+
+            # reconnect straight away after a dropped connection;
+            # only back off while connection attempts are failing
+            if not dropped:
+                await asyncio.sleep(self._RECONNECT_DELAY_S)
+
+    def _close_ws(self) -> None:
+        if self.ws is not None:
+            self._get_loop().create_task(self.ws.close())
+
+    def _reconnect(self, ws):
+        self._call_in_loop(self._close_ws)
+
+    def reconnect(self) -> None:
+        self._call_in_loop(self._close_ws)
+
+    def _cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def close(self) -> None:
+        self._call_in_loop(self._cancel)
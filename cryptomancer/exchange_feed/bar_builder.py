@@ -0,0 +1,268 @@
+import datetime
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+import numpy
+
+from cryptomancer.exchange_feed.ring_buffer import RingBuffer
+
+# pandas is only needed to seed bars from a DataFrame; feeds must not depend on it
+if TYPE_CHECKING:
+    import pandas
+
+
+BAR_DTYPE = numpy.dtype([
+    ('time', 'f8'),         # start of the bar, epoch seconds
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),       # traded notional, as in FTX's historical prices
+])
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def to_seconds(resolution: Union[str, int]) -> int:
+    """
+        Bar resolution in seconds, from e.g. '1s', '1m', '5m', '1h' or a number of seconds.
+    """
+    if isinstance(resolution, str):
+        return int(resolution[:-1]) * _UNITS[resolution[-1]]
+    return int(resolution)
+
+
+class BarSeries(object):
+    """
+        Fixed-capacity OHLCV bars for one market at one resolution, the last `capacity`
+        bars kept in a ring indexed by bar number (bar start // resolution).
+
+        Bars are built the way FTX builds its historical prices: a bar without trades
+        opens, closes, highs and lows at the previous close with no volume.  A late trade
+        (one for a bar older than the newest) is added to its bar, as long as that bar is
+        within the last `capacity`, and counted in `late`; older ones are counted in
+        `dropped`.  A late trade from before the first bar built starts the series at its
+        bar, the bars in between flat at its price.
+
+        `cursor` is the trade buffer sequence number of the last trade the series was built
+        from, so that trades are not added twice (see `BarBuilder.add_series`).
+    """
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self._capacity = capacity
+        self._bars = numpy.zeros(capacity, dtype = BAR_DTYPE)
+        # time of the first and last trade in each bar, so a late trade only moves
+        # the open or close if it was the earliest or latest trade
+        self._first = numpy.zeros(capacity)
+        self._last = numpy.zeros(capacity)
+        self._first_number = None
+        self._newest = None
+        self.cursor = 0
+        self.late = 0
+        self.dropped = 0
+
+    def _oldest(self) -> int:
+        return max(self._newest - self._capacity + 1, self._first_number)
+
+    def _fill_gap(self, start: int, end: int, price: float) -> None:
+        # bars (start, end) exclusive without trades, flat at `price`; only the last
+        # `capacity` of them can still be held
+        for number in range(max(start + 1, end - self._capacity), end):
+            i = number % self._capacity
+            self._bars[i] = (number * self.resolution, price, price, price, price, 0.)
+            self._first[i] = numpy.inf
+            self._last[i] = -numpy.inf
+
+    def add(self, time: float, price: float, size: float) -> None:
+        number = int(time // self.resolution)
+
+        if self._newest is None or number > self._newest:
+            if self._newest is not None:
+                self._fill_gap(self._newest, number, self._bars['close'][self._newest % self._capacity])
+
+            i = number % self._capacity
+            self._bars[i] = (number * self.resolution, price, price, price, price, price * size)
+            self._first[i] = time
+            self._last[i] = time
+            self._newest = number
+            if self._first_number is None:
+                self._first_number = number
+            return
+
+        if number <= self._newest - self._capacity:
+            self.dropped += 1
+            return
+
+        if number < self._first_number:
+            # earlier than anything built so far, but still within capacity
+            self._fill_gap(number, self._first_number, price)
+            i = number % self._capacity
+            self._bars[i] = (number * self.resolution, price, price, price, price, price * size)
+            self._first[i] = time
+            self._last[i] = time
+            self._first_number = number
+            self.late += 1
+            return
+
+        if number < self._newest:
+            self.late += 1
+
+        i = number % self._capacity
+        bar = self._bars[i]
+        if bar['volume'] == 0:
+            # a gap filled bar: the trade is its only one
+            bar['open'] = bar['high'] = bar['low'] = price
+        else:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+
+        bar['volume'] += price * size
+
+        if time < self._first[i]:
+            bar['open'] = price
+            self._first[i] = time
+
+        if time >= self._last[i]:
+            bar['close'] = price
+            self._last[i] = time
+            # any gap filled bars after this one were flat at its close
+            self._refill_after(number, price)
+
+    def _refill_after(self, number: int, price: float) -> None:
+        for later in range(number + 1, self._newest + 1):
+            i = later % self._capacity
+            if self._bars['volume'][i] != 0:
+                break
+            self._bars[i] = (later * self.resolution, price, price, price, price, 0.)
+
+    def seed(self, bars: numpy.ndarray) -> None:
+        """
+            Stores complete historical `bars` (BAR_DTYPE, oldest first); trades then build
+            on from the newest.
+        """
+        for bar in bars:
+            number = int(bar['time'] // self.resolution)
+            if self._newest is not None and number <= self._newest - self._capacity:
+                continue
+
+            if self._first_number is not None and number < self._first_number - 1:
+                # the bars in between were never built
+                self._fill_gap(number, self._first_number, bar['close'])
+
+            if self._newest is None or number > self._newest:
+                if self._newest is not None:
+                    self._fill_gap(self._newest, number, self._bars['close'][self._newest % self._capacity])
+                self._newest = number
+
+            if self._first_number is None or number < self._first_number:
+                self._first_number = number
+
+            i = number % self._capacity
+            self._bars[i] = bar
+            # trades inside a seeded bar cannot be placed before its open or after its close
+            self._first[i] = -numpy.inf
+            self._last[i] = numpy.inf
+
+    def get(self, n: int) -> numpy.ndarray:
+        if self._newest is None:
+            return self._bars[:0].copy()
+
+        start = max(self._newest - n + 1, self._oldest())
+        return self._bars[numpy.arange(start, self._newest + 1) % self._capacity]
+
+
+class BarBuilder(object):
+    """
+        Rolling OHLCV bars per (market, resolution), built incrementally from trades.
+        A series only exists once asked for, so markets and resolutions nobody reads
+        cost nothing per trade.
+    """
+    def __init__(self, capacity: int = 1440):
+        self._capacity = capacity
+        self._series: Dict[str, Dict[int, BarSeries]] = {}
+        self._lock = Lock()
+
+    def has_series(self, market: str, resolution: Union[str, int]) -> bool:
+        return to_seconds(resolution) in self._series.get(market, {})
+
+    def add_series(self, market: str, resolution: Union[str, int], trade_buffer: Optional[RingBuffer] = None) -> BarSeries:
+        """
+            Starts building `market` bars at `resolution`, from the trades (TRADE_DTYPE)
+            already in `trade_buffer` if given.
+
+            The series is registered before the buffer is read, both under the lock
+            `add_trade` takes: a trade appended before the read is built from the buffer
+            and skipped by `add_trade` (by its sequence number), and one appended after is
+            added by `add_trade`, so none is missed or counted twice.
+        """
+        resolution = to_seconds(resolution)
+        with self._lock:
+            series = self._series.get(market, {}).get(resolution)
+            if series is not None:
+                return series
+
+            series = BarSeries(resolution, self._capacity)
+
+            # replaced rather than mutated, so add_trade can read it without the lock
+            market_series = dict(self._series.get(market, {}))
+            market_series[resolution] = series
+            self._series[market] = market_series
+
+            if trade_buffer is not None:
+                trades, series.cursor = trade_buffer.since(0)
+                for trade in trades:
+                    series.add(trade['time'], trade['price'], trade['size'])
+
+            return series
+
+    def add_trade(self, market: str, time: float, price: float, size: float, sequence: Optional[int] = None) -> None:
+        """
+            Adds a trade to every series of `market`; `sequence` is the trade's buffer
+            cursor once appended, and the trade is skipped by a series already built from it.
+        """
+        market_series = self._series.get(market)
+        if not market_series:
+            return
+
+        with self._lock:
+            for series in market_series.values():
+                if sequence is not None and sequence <= series.cursor:
+                    continue
+                series.add(time, price, size)
+
+    def seed(self, market: str, resolution: Union[str, int], bars: Union[numpy.ndarray, 'pandas.DataFrame']) -> None:
+        """
+            Seeds `market` bars at `resolution` with history: either BAR_DTYPE records or a
+            DataFrame of open / high / low / close / volume indexed by UTC start time, as
+            returned by `SecurityMaster.get_prices`.
+        """
+        if not isinstance(bars, numpy.ndarray):
+            bars = to_bar_array(bars)
+
+        series = self.add_series(market, resolution)
+        with self._lock:
+            series.seed(numpy.sort(bars, order = 'time'))
+
+    def get_bars(self, market: str, resolution: Union[str, int], n: int) -> numpy.ndarray:
+        series = self._series[market][to_seconds(resolution)]
+        with self._lock:
+            return series.get(n)
+
+    def get_stats(self) -> Dict[Tuple[str, int], Dict[str, int]]:
+        return {(market, resolution): {'late': series.late, 'dropped': series.dropped}
+                    for market, market_series in self._series.items()
+                    for resolution, series in market_series.items()}
+
+
+def to_bar_array(df: 'pandas.DataFrame') -> numpy.ndarray:
+    import pandas
+
+    bars = numpy.zeros(len(df), dtype = BAR_DTYPE)
+    index = pandas.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(datetime.timezone.utc)
+
+    bars['time'] = index.map(lambda start: start.timestamp()).to_numpy(dtype = float)
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        bars[column] = df[column].to_numpy(dtype = float)
+    return bars
@@ -0,0 +1,39 @@
+import json
+from typing import Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+Decoder = Callable[[Union[str, bytes]], Dict]
+
+_DECODERS: Dict[str, Optional[Decoder]] = {
+    'orjson': orjson.loads if orjson is not None else None,
+    'json': json.loads,
+}
+
+
+def available_decoders() -> List[str]:
+    return [name for name, decoder in _DECODERS.items() if decoder is not None]
+
+
+def get_decoder(name: Optional[str] = None) -> Decoder:
+    """
+        Returns a function decoding a raw websocket frame (`str` or `bytes`) into a dict.
+
+        `name` may be 'orjson' or 'json'; if omitted, the fastest installed decoder is used,
+        falling back to the standard library.
+    """
+    if name is None:
+        return _DECODERS[available_decoders()[0]]
+
+    if name not in _DECODERS:
+        raise Exception(f"Unknown decoder '{name}'.")
+
+    decoder = _DECODERS[name]
+    if decoder is None:
+        raise Exception(f"Decoder '{name}' is not installed.")
+
+    return decoder
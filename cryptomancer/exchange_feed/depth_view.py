@@ -0,0 +1,130 @@
+from typing import Optional, Tuple
+
+import numpy
+
+
+class DepthSide(object):
+    """
+        Price levels on one side of a book, best first, with cumulative size and
+        notional so that depth queries are a `searchsorted` rather than a walk.
+    """
+    def __init__(self, prices: numpy.ndarray, sizes: numpy.ndarray, descending: bool):
+        self.prices = prices
+        self.sizes = sizes
+        self.cumulative_sizes = numpy.cumsum(sizes)
+        self.cumulative_notionals = numpy.cumsum(prices * sizes)
+        # sort keys ascending from the best price outwards, as in OrderBookSide
+        self._keys = -prices if descending else prices
+        self._sign = -1. if descending else 1.
+
+        for array in (self.prices, self.sizes, self.cumulative_sizes, self.cumulative_notionals, self._keys):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def best(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    def best_level(self) -> Optional[Tuple[float, float]]:
+        return (float(self.prices[0]), float(self.sizes[0])) if len(self.prices) else None
+
+    def _fill(self, i: int, size: float) -> float:
+        # notional paid to fill `size`, exhausting levels [0, i) and partially filling level i
+        if i == 0:
+            return size * self.prices[0]
+        return self.cumulative_notionals[i - 1] + (size - self.cumulative_sizes[i - 1]) * self.prices[i]
+
+    def vwap(self, size: float) -> Optional[float]:
+        i = int(numpy.searchsorted(self.cumulative_sizes, size))
+        if size <= 0 or i == len(self.prices):
+            return None
+        return float(self._fill(i, size) / size)
+
+    def impact_price(self, size: float) -> Optional[float]:
+        i = int(numpy.searchsorted(self.cumulative_sizes, size))
+        if size <= 0 or i == len(self.prices):
+            return None
+        return float(self.prices[i])
+
+    def vwap_for_notional(self, notional: float) -> Optional[float]:
+        i = int(numpy.searchsorted(self.cumulative_notionals, notional))
+        if notional <= 0 or i == len(self.prices):
+            return None
+
+        filled = (notional if i == 0 else notional - self.cumulative_notionals[i - 1]) / self.prices[i]
+        if i > 0:
+            filled += self.cumulative_sizes[i - 1]
+        return float(notional / filled)
+
+    def size_for_slippage(self, bps: float) -> float:
+        if not len(self.prices):
+            return 0.
+
+        # worst acceptable price, `bps` away from the touch in the direction of the book
+        limit = self.prices[0] * (1. + self._sign * bps / 10000.)
+        n = int(numpy.searchsorted(self._keys, self._sign * limit, side = 'right'))
+        return float(self.cumulative_sizes[n - 1]) if n else 0.
+
+
+class DepthView(object):
+    """
+        Immutable, NumPy-backed view of an order book's depth at one point in time,
+        answering "what would it cost to trade this much right now?".  `version` is
+        the version of the OrderBook it was taken from.  `verified` is False if the
+        book's last update was published without its checksum being checked, as
+        happens between samples with a `checksum_interval` or `checksum_period`.
+
+        `side` is the side of the trade: a 'buy' walks the asks, a 'sell' walks the bids.
+        Queries needing more size than the book shows return None.
+    """
+    def __init__(self, bid_prices: numpy.ndarray, bid_sizes: numpy.ndarray,
+                    ask_prices: numpy.ndarray, ask_sizes: numpy.ndarray, timestamp: float, version: int = 0,
+                    verified: bool = True):
+        self.bids = DepthSide(bid_prices, bid_sizes, descending = True)
+        self.asks = DepthSide(ask_prices, ask_sizes, descending = False)
+        self.timestamp = timestamp
+        self.version = version
+        self.verified = verified
+
+    def _side(self, side: str) -> DepthSide:
+        if side == 'buy':
+            return self.asks
+        elif side == 'sell':
+            return self.bids
+        raise Exception(f"Unknown side '{side}'.")
+
+    def impact_price(self, side: str, size: float) -> Optional[float]:
+        """
+            Worst price reached when trading `size` units, i.e. the limit price that fills it.
+        """
+        return self._side(side).impact_price(size)
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """
+            Average price paid / received when trading `size` units.
+        """
+        return self._side(side).vwap(size)
+
+    def vwap_for_notional(self, side: str, usd: float) -> Optional[float]:
+        """
+            Average price paid / received when trading `usd` of notional.
+        """
+        return self._side(side).vwap_for_notional(usd)
+
+    def size_for_slippage(self, side: str, bps: float) -> float:
+        """
+            Units that can be traded without going more than `bps` basis points through the touch.
+        """
+        return self._side(side).size_for_slippage(bps)
+
+    def slippage(self, side: str, size: float) -> Optional[float]:
+        """
+            Slippage of the VWAP for `size` units from the touch, in basis points.
+        """
+        depth_side = self._side(side)
+        vwap = depth_side.vwap(size)
+        if vwap is None:
+            return None
+        best = depth_side.best()
+        return (vwap / best - 1.) * depth_side._sign * 10000.
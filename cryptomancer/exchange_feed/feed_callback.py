@@ -0,0 +1,94 @@
+from concurrent.futures import Executor
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from cryptomancer.exchange_feed.feed_queue import LATEST_CHANNELS
+
+
+# channels whose callbacks are called with the event only, as it names its own market
+_UNKEYED_CHANNELS = {'fills', 'orders'}
+
+
+class FeedCallback(object):
+    """
+        A function called with every update on one feed channel, optionally limited
+        to `markets`: `fn(market, data)`, or `fn(data)` for fills and orders.
+
+        Without an `executor`, `fn` is called on the websocket thread as soon as the
+        update has been applied, so it holds up every message behind it on that
+        connection.  With one, each call is submitted to the executor instead; ticker and
+        order book calls still pending when the next update arrives are conflated into
+        one call with the latest data, counted in `conflated`.
+
+        If given, `resolve` is applied to the data just before `fn` is called, e.g. to
+        snapshot an order book.  Exceptions raised by `fn` are logged and counted in
+        `errors` rather than propagated, so a failing callback cannot drop the connection.
+    """
+    def __init__(self, channel: str, markets: Optional[Iterable[str]], fn: Callable,
+                    executor: Optional[Executor] = None, resolve: Optional[Callable[[Any], Any]] = None):
+        self.channel = channel
+        self.markets = set(markets) if markets is not None else None
+        self._fn = fn
+        self._executor = executor
+        self._resolve = resolve
+        self._with_market = channel not in _UNKEYED_CHANNELS
+
+        self._conflate = executor is not None and channel in LATEST_CHANNELS
+        self._pending: Dict[Optional[str], Any] = {}
+        self._pending_lock = Lock()
+
+        self.conflated = 0
+        self.errors = 0
+
+    def accepts(self, market: Optional[str]) -> bool:
+        return self.markets is None or market in self.markets
+
+    def put(self, market: Optional[str], data: Any) -> None:
+        if self._executor is None:
+            self._call(market, data)
+
+        elif self._conflate:
+            with self._pending_lock:
+                pending = market in self._pending
+                self._pending[market] = data
+
+            if pending:
+                self.conflated += 1
+            else:
+                self._executor.submit(self._call_latest, market)
+
+        else:
+            self._executor.submit(self._call, market, data)
+
+    def _call_latest(self, market: Optional[str]) -> None:
+        # taken before calling, so an update arriving during the call schedules another
+        with self._pending_lock:
+            data = self._pending.pop(market)
+        self._call(market, data)
+
+    def _call(self, market: Optional[str], data: Any) -> None:
+        try:
+            if self._resolve is not None:
+                data = self._resolve(data)
+
+            if self._with_market:
+                self._fn(market, data)
+            else:
+                self._fn(data)
+
+        except Exception:
+            self.errors += 1
+            logger.exception(f'Error in {self.channel} callback {self._fn!r}')
+
+
+def create_callback(channel: str, markets: Optional[Iterable[str]], fn: Callable,
+                        executor: Optional[Executor] = None) -> FeedCallback:
+    """
+        Creates the callback for `channel`; order book callbacks are passed a DepthView
+        snapshot, taken when the callback runs.
+    """
+    if channel == 'orderbook':
+        return FeedCallback(channel, markets, fn, executor, resolve = lambda orderbook: orderbook.snapshot())
+    return FeedCallback(channel, markets, fn, executor)
@@ -0,0 +1,133 @@
+from collections import OrderedDict, deque, namedtuple
+from threading import Condition
+from typing import Any, Callable, Deque, Iterable, List, Optional
+
+
+FeedEvent = namedtuple('FeedEvent', ['channel', 'market', 'data'])
+
+
+class FeedQueue(object):
+    """
+        A single consumer's queue of events from one feed channel, optionally limited
+        to `markets`.
+
+        `put` is called from websocket threads and never blocks on the consumer: each
+        subclass decides what to do with events the consumer has not caught up with.
+    """
+    def __init__(self, channel: str, markets: Optional[Iterable[str]] = None):
+        self.channel = channel
+        self.markets = set(markets) if markets is not None else None
+        self._condition = Condition()
+
+    def accepts(self, market: Optional[str]) -> bool:
+        return self.markets is None or market in self.markets
+
+    def put(self, market: Optional[str], data: Any) -> None:
+        raise NotImplementedError
+
+    def _pop(self) -> FeedEvent:
+        raise NotImplementedError
+
+    def _resolve(self, event: FeedEvent) -> FeedEvent:
+        return event
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get(self, timeout: Optional[float] = None) -> Optional[FeedEvent]:
+        """
+            Returns the next event, waiting up to `timeout` seconds (forever if None) for
+            one to arrive; None if none did.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self) > 0, timeout):
+                return None
+            event = self._pop()
+        return self._resolve(event)
+
+    def drain(self) -> List[FeedEvent]:
+        """
+            Returns every event queued so far without waiting.
+        """
+        with self._condition:
+            events = [self._pop() for _ in range(len(self))]
+        return [self._resolve(event) for event in events]
+
+
+class LatestQueue(FeedQueue):
+    """
+        Conflating queue keeping only the latest event per market: a consumer that falls
+        behind skips straight to the current state.  `conflated` counts the events
+        overwritten before being read.
+
+        If given, `resolve` is applied to the data as it is read, e.g. to snapshot an
+        order book only when the consumer gets to it.
+    """
+    def __init__(self, channel: str, markets: Optional[Iterable[str]] = None,
+                    resolve: Optional[Callable[[Any], Any]] = None):
+        super().__init__(channel, markets)
+        self._latest: 'OrderedDict[Optional[str], Any]' = OrderedDict()
+        self._resolve_data = resolve
+        self.conflated = 0
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def put(self, market: Optional[str], data: Any) -> None:
+        with self._condition:
+            if market in self._latest:
+                # keep the market's place in line, so busy markets cannot starve quiet ones
+                self.conflated += 1
+            self._latest[market] = data
+            self._condition.notify()
+
+    def _pop(self) -> FeedEvent:
+        market, data = self._latest.popitem(last = False)
+        return FeedEvent(self.channel, market, data)
+
+    def _resolve(self, event: FeedEvent) -> FeedEvent:
+        if self._resolve_data is None:
+            return event
+        return event._replace(data = self._resolve_data(event.data))
+
+
+class BoundedQueue(FeedQueue):
+    """
+        Queue keeping every event up to `capacity`; once full, new events are dropped
+        and counted in `dropped` until the consumer catches up.
+    """
+    def __init__(self, channel: str, markets: Optional[Iterable[str]] = None, capacity: int = 10000):
+        super().__init__(channel, markets)
+        self._events: Deque[FeedEvent] = deque()
+        self._capacity = capacity
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def put(self, market: Optional[str], data: Any) -> None:
+        with self._condition:
+            if len(self._events) >= self._capacity:
+                self.dropped += 1
+                return
+            self._events.append(FeedEvent(self.channel, market, data))
+            self._condition.notify()
+
+    def _pop(self) -> FeedEvent:
+        return self._events.popleft()
+
+
+# channels where only the current state matters; the rest are streams of events
+LATEST_CHANNELS = {'ticker', 'orderbook'}
+
+
+def create_queue(channel: str, markets: Optional[Iterable[str]] = None, capacity: int = 10000) -> FeedQueue:
+    """
+        Creates the queue for `channel`: latest-only for tickers and order books (an order book
+        is snapshotted when read), everything up to `capacity` for trades, fills and orders.
+    """
+    if channel == 'orderbook':
+        return LatestQueue(channel, markets, resolve = lambda orderbook: orderbook.snapshot())
+    elif channel in LATEST_CHANNELS:
+        return LatestQueue(channel, markets)
+    return BoundedQueue(channel, markets, capacity)
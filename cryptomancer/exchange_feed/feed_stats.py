@@ -0,0 +1,154 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict, Optional, Tuple
+
+import numpy
+
+
+class LatencyHistogram(object):
+    """
+        Fixed-memory, HDR-style latency histogram.
+
+        Values are recorded in whole microseconds into log-linear buckets: exact below
+        32us, then 16 buckets per power of two, so any recorded value is reported to
+        within ~6% however long the histogram runs.  Values above ~38 hours land in the
+        last bucket; negative values (e.g. exchange clock ahead of ours) count as 0.
+    """
+    _SUB_BUCKETS = 16
+    _EXACT = 2 * _SUB_BUCKETS
+    _MAX_SHIFT = 32
+
+    def __init__(self):
+        self._counts = numpy.zeros(self._EXACT + self._MAX_SHIFT * self._SUB_BUCKETS, dtype = numpy.int64)
+        self.count = 0
+        self.negative = 0
+        self._total = 0.
+        self._min = float('inf')
+        self._max = 0.
+
+    @classmethod
+    def _index(cls, microseconds: int) -> int:
+        if microseconds < cls._EXACT:
+            return microseconds
+
+        shift = min(microseconds.bit_length() - 5, cls._MAX_SHIFT)
+        sub_bucket = min((microseconds >> shift) - cls._SUB_BUCKETS, cls._SUB_BUCKETS - 1)
+        return cls._EXACT + (shift - 1) * cls._SUB_BUCKETS + sub_bucket
+
+    @classmethod
+    def _value(cls, index: int) -> float:
+        # midpoint of the bucket, in microseconds
+        if index < cls._EXACT:
+            return float(index)
+
+        shift = (index - cls._EXACT) // cls._SUB_BUCKETS + 1
+        sub_bucket = (index - cls._EXACT) % cls._SUB_BUCKETS + cls._SUB_BUCKETS
+        return (sub_bucket + 0.5) * (1 << shift)
+
+    def record(self, seconds: float) -> None:
+        if seconds < 0:
+            self.negative += 1
+            seconds = 0.
+
+        self._counts[self._index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self._total += seconds
+        self._min = min(self._min, seconds)
+        self._max = max(self._max, seconds)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        self._counts += other._counts
+        self.count += other.count
+        self.negative += other.negative
+        self._total += other._total
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def _percentile(self, cumulative_counts: numpy.ndarray, p: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = max(1, int(numpy.ceil(p / 100. * self.count)))
+        index = int(numpy.searchsorted(cumulative_counts, rank))
+        return min(max(self._value(index) / 1e6, self._min), self._max)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+            Returns the `p`th percentile (0 - 100) in seconds, or None if nothing was recorded.
+        """
+        return self._percentile(numpy.cumsum(self._counts), p)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        # latencies in seconds
+        cumulative_counts = numpy.cumsum(self._counts)
+
+        return {
+            'count': self.count,
+            'mean': self._total / self.count if self.count else None,
+            'min': self._min if self.count else None,
+            'p50': self._percentile(cumulative_counts, 50),
+            'p90': self._percentile(cumulative_counts, 90),
+            'p99': self._percentile(cumulative_counts, 99),
+            'p99.9': self._percentile(cumulative_counts, 99.9),
+            'max': self._max if self.count else None,
+        }
+
+
+class ChannelStats(object):
+    """
+        Message count and latency histograms for one (channel, market):
+            - network: exchange timestamp -> received (includes any clock offset)
+            - handling: received -> handler complete
+    """
+    def __init__(self):
+        self.messages = 0
+        self.network = LatencyHistogram()
+        self.handling = LatencyHistogram()
+
+    def summary(self) -> Dict:
+        return {
+            'messages': self.messages,
+            'network': self.network.summary(),
+            'handling': self.handling.summary(),
+        }
+
+
+class FeedStats(object):
+    def __init__(self):
+        self._channels: DefaultDict[Tuple[str, Optional[str]], ChannelStats] = defaultdict(ChannelStats)
+
+    def record(self, channel: str, market: Optional[str], exchange_time: Optional[float],
+                    received_at: float, handled_at: float) -> None:
+        stats = self._channels[(channel, market)]
+        stats.messages += 1
+        stats.handling.record(handled_at - received_at)
+
+        if exchange_time is not None:
+            stats.network.record(received_at - exchange_time)
+
+    def summary(self) -> Dict[str, Dict[Optional[str], Dict]]:
+        # {channel: {market: stats}}; market is None for the private channels
+        summary = defaultdict(dict)
+        for (channel, market), stats in list(self._channels.items()):
+            summary[channel][market] = stats.summary()
+        return dict(summary)
+
+    def log_line(self) -> str:
+        """
+            One line summarising every channel (over all its markets): message count,
+            then p50 / p99 of network and handling latency in milliseconds.
+        """
+        by_channel = defaultdict(ChannelStats)
+        for (channel, market), stats in list(self._channels.items()):
+            merged = by_channel[channel]
+            merged.messages += stats.messages
+            merged.network.merge(stats.network)
+            merged.handling.merge(stats.handling)
+
+        def ms(histogram: LatencyHistogram, p: float) -> str:
+            value = histogram.percentile(p)
+            return '-' if value is None else f'{value * 1e3:.2f}'
+
+        return ' | '.join(f'{channel} {stats.messages:,} msgs, '
+                            f'net {ms(stats.network, 50)}/{ms(stats.network, 99)}ms, '
+                            f'handler {ms(stats.handling, 50)}/{ms(stats.handling, 99)}ms'
+                            for channel, stats in sorted(by_channel.items()))
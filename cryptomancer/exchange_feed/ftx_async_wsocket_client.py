@@ -0,0 +1,68 @@
+import asyncio
+from collections import defaultdict
+from typing import Callable, DefaultDict, Dict, List, Optional, Tuple
+
+from cryptomancer.exchange_feed.async_websocket_manager import AsyncWebsocketManager
+from cryptomancer.exchange_feed.ftx_wsocket_client import FtxWebsocketClient
+
+
+class AsyncFtxWebsocketClient(FtxWebsocketClient, AsyncWebsocketManager):
+    """
+        FtxWebsocketClient running on an asyncio event loop.
+
+        Message handling and the synchronous getters are inherited unchanged;
+        the transport comes from AsyncWebsocketManager.  Coroutines can use
+        `wait_for_ticker` / `wait_for_orderbook` instead of the blocking
+        getters, which must not be called from the manager's own loop.
+    """
+    def __init__(self, account: Optional[str] = None, feed_endpoint: Optional[str] = None,
+                    loop: Optional[asyncio.AbstractEventLoop] = None, **kwargs) -> None:
+        super().__init__(account, feed_endpoint, **kwargs)
+        self._loop = loop
+        self._waiters: DefaultDict[Tuple[str, str], List[asyncio.Future]] = defaultdict(list)
+
+
+    def _notify_waiters(self, channel: str, market: str) -> None:
+        for waiter in self._waiters.pop((channel, market), []):
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+    async def _wait_until(self, channel: str, market: str, ready: Callable[[], bool], 
+                            timeout: Optional[float]) -> None:
+        # runs on the manager's loop, where subscribing only starts the connection
+        # and queues the request rather than blocking until connected, and where no
+        # update can slip in between checking `ready` and registering the waiter
+        self._ensure_subscribed(channel, market)
+        if ready():
+            return
+
+        waiter = self._get_loop().create_future()
+        self._waiters[(channel, market)].append(waiter)
+        await asyncio.wait_for(waiter, timeout)
+
+
+    async def wait_for_ticker(self, market: str, timeout: Optional[float] = None) -> Dict:
+        await self._run_in_loop(self._wait_until('ticker', market, lambda: bool(self._tickers[market]), timeout))
+        return self._tickers[market]
+
+
+    async def wait_for_orderbook(self, market: str, timeout: Optional[float] = None) -> Dict[str, List[Tuple[float, float]]]:
+        await self._run_in_loop(self._wait_until('orderbook', market, 
+                                                    lambda: self.get_orderbook_timestamp(market) != 0, timeout))
+        return self._orderbooks[market].get_orderbook()
+
+
+    def _handle_ticker_message(self, message: Dict) -> None:
+        super()._handle_ticker_message(message)
+        self._notify_waiters('ticker', message['market'])
+
+
+    def _handle_orderbook_message(self, message: Dict) -> None:
+        super()._handle_orderbook_message(message)
+
+        market = message['market']
+        # the book is dropped when its checksum fails, in which case
+        # waiters keep waiting for the fresh partial
+        if market in self._orderbooks and self._orderbooks[market].timestamp:
+            self._notify_waiters('orderbook', market)
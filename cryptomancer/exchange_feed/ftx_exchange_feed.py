@@ -1,47 +1,270 @@
-from typing import List, Dict, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Optional, Tuple, Union
+import zlib
+
 import numpy
 
 from cryptomancer.exchange_feed import ExchangeFeed
-from cryptomancer.exchange_feed.ftx_wsocket_client import FtxWebsocketClient
+from cryptomancer.exchange_feed.ftx_wsocket_client import FtxWebsocketClient, FeedConsumer
+from cryptomancer.exchange_feed.ftx_async_wsocket_client import AsyncFtxWebsocketClient
+from cryptomancer.exchange_feed.journal import JournalWriter
+from cryptomancer.exchange_feed.depth_view import DepthView
+from cryptomancer.exchange_feed.orderbook import BookAnalytics
+from cryptomancer.exchange_feed.feed_stats import LatencyHistogram
+from cryptomancer.exchange_feed.feed_queue import FeedQueue, create_queue
+from cryptomancer.exchange_feed.feed_callback import FeedCallback, create_callback
+
+# for the seed_bars annotation only
+if TYPE_CHECKING:
+    import pandas
 
 class FtxExchangeFeed(ExchangeFeed):
-    def __init__(self, account_name: Optional[str] = None, feed_endpoint: Optional[str] = None):
-        self.wsocket_client = FtxWebsocketClient(account_name, feed_endpoint)
+    """
+        Exchange feed for FTX, sharding subscriptions over several websocket connections
+        so that a busy channel cannot hold up messages queued behind it on the same socket:
+
+            - fills and orders always get a dedicated (authenticated) connection
+            - tickers and trades are hashed by market over `market_connections` sockets
+            - orderbooks are hashed by market over `orderbook_connections` sockets, or share
+              the ticker / trade sockets if `orderbook_connections` is 0
+
+        Connections are only opened once something is subscribed on them.
+
+        Passing a `recorder` journals the raw frames received on every connection, and a
+        `stats_log_interval` logs each connection's feed statistics that often.
+    """
+    def __init__(self, account_name: Optional[str] = None, feed_endpoint: Optional[str] = None,
+                    checksum_interval: int = 1, checksum_period: Optional[float] = None,
+                    use_asyncio: bool = False, market_connections: int = 1, orderbook_connections: int = 1,
+                    decoder: Optional[str] = None, recorder: Optional[JournalWriter] = None,
+                    stats_log_interval: Optional[float] = None, bar_capacity: int = 1440,
+                    imbalance_levels: int = 10, pressure_halflife: float = 1.):
+        self._account_name = account_name
+        self._feed_endpoint = feed_endpoint
+
+        # the asyncio client multiplexes every feed onto one shared event loop
+        # thread instead of running a thread per connection
+        self._client_class = AsyncFtxWebsocketClient if use_asyncio else FtxWebsocketClient
+        self._client_kwargs = {'checksum_interval': checksum_interval, 'checksum_period': checksum_period,
+                                'decoder': decoder, 'recorder': recorder, 'stats_log_interval': stats_log_interval,
+                                'bar_capacity': bar_capacity, 'imbalance_levels': imbalance_levels,
+                                'pressure_halflife': pressure_halflife}
+
+        self._private_client = self._create_client(account_name)
+        self._market_clients = [self._create_client(None) for _ in range(max(1, market_connections))]
+        self._orderbook_clients = [self._create_client(None) for _ in range(orderbook_connections)]
+
+        if not self._orderbook_clients:
+            self._orderbook_clients = self._market_clients
+
+        # kept for callers that reach for the underlying client directly
+        self.wsocket_client = self._private_client
+
+    def _create_client(self, account_name: Optional[str]) -> FtxWebsocketClient:
+        return self._client_class(account_name, self._feed_endpoint, **self._client_kwargs)
+
+    def _shard(self, clients: List[FtxWebsocketClient], market: str) -> FtxWebsocketClient:
+        # crc32 rather than hash() so a market maps to the same shard in every process
+        return clients[zlib.crc32(market.encode()) % len(clients)]
+
+    def _market_client(self, market: str) -> FtxWebsocketClient:
+        return self._shard(self._market_clients, market)
+
+    def _orderbook_client(self, market: str) -> FtxWebsocketClient:
+        return self._shard(self._orderbook_clients, market)
+
+    def _clients(self) -> List[FtxWebsocketClient]:
+        clients = [self._private_client] + self._market_clients
+        if self._orderbook_clients is not self._market_clients:
+            clients = clients + self._orderbook_clients
+        return clients
+
+    def subscribe_many(self, markets: Iterable[str], channels: Iterable[str]) -> None:
+        markets = list(markets)
+        shards = defaultdict(lambda: defaultdict(list))
+
+        for channel in channels:
+            if channel in FtxWebsocketClient._PRIVATE_CHANNELS:
+                shards[self._private_client][channel] = markets
+                continue
+
+            for market in markets:
+                client = self._orderbook_client(market) if channel == 'orderbook' else self._market_client(market)
+                shards[client][channel].append(market)
+
+        for client, channel_markets in shards.items():
+            for channel, client_markets in channel_markets.items():
+                client.subscribe_many(client_markets, [channel])
 
     def get_orders(self) -> Dict[int, Dict]:
-        return self.wsocket_client.get_orders()
+        return self._private_client.get_orders()
+
+    def _add_consumer(self, consumer: FeedConsumer) -> None:
+        channel = consumer.channel
+
+        if channel in FtxWebsocketClient._PRIVATE_CHANNELS:
+            clients = [self._private_client]
+        elif consumer.markets is None:
+            clients = self._orderbook_clients if channel == 'orderbook' else self._market_clients
+        else:
+            clients = []
+            for market in consumer.markets:
+                client = self._channel_client(market, channel)
+                if client not in clients:
+                    clients.append(client)
+
+        for client in clients:
+            client.add_consumer(consumer)
+
+        if consumer.markets is not None or channel in FtxWebsocketClient._PRIVATE_CHANNELS:
+            self.subscribe_many(consumer.markets or [], [channel])
+
+    def _remove_consumer(self, consumer: FeedConsumer) -> None:
+        for client in self._clients():
+            client.remove_consumer(consumer)
+
+    def subscribe_queue(self, channel: str, markets: Optional[Iterable[str]] = None, capacity: int = 10000) -> FeedQueue:
+        """
+            Returns a new queue receiving every `channel` update for `markets` (or for every
+            subscribed market, if None), subscribing to them if needed.  Each consumer should
+            use its own queue; see `cryptomancer.exchange_feed.feed_queue.create_queue`.
+        """
+        queue = create_queue(channel, markets, capacity)
+        self._add_consumer(queue)
+        return queue
+
+    def unsubscribe_queue(self, queue: FeedQueue) -> None:
+        self._remove_consumer(queue)
+
+    def _add_callback(self, channel: str, market: Optional[str], fn: Callable,
+                        executor: Optional[Executor]) -> FeedCallback:
+        callback = create_callback(channel, [market] if market is not None else None, fn, executor)
+        self._add_consumer(callback)
+        return callback
+
+    def on_ticker(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Registers `fn(market, ticker)`, called on every ticker update for `market`; see
+            FtxWebsocketClient.on_ticker.  The on_* callbacks run on the websocket thread of
+            the connection the market is sharded to unless an `executor` is given.
+        """
+        return self._add_callback('ticker', market, fn, executor)
+
+    def on_book(self, market: str, fn: Callable[[str, DepthView], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        return self._add_callback('orderbook', market, fn, executor)
+
+    def on_trade(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        return self._add_callback('trades', market, fn, executor)
+
+    def on_fill(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        return self._add_callback('fills', None, fn, executor)
+
+    def on_order(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        return self._add_callback('orders', None, fn, executor)
+
+    def remove_callback(self, callback: FeedCallback) -> None:
+        self._remove_consumer(callback)
+
+    def get_orders_changed_since(self, cursor: int = 0) -> Tuple[Dict[int, Dict], int]:
+        return self._private_client.get_orders_changed_since(cursor)
+
+    def get_orders_cursor(self) -> Optional[int]:
+        return self._private_client.get_orders_cursor()
+
+    def get_fills_cursor(self) -> Optional[int]:
+        return self._private_client.get_fills_cursor()
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        return self._private_client.get_order(order_id)
+
+    def wait_for_order(self, order_id: int, predicate: Callable[[Dict], bool], 
+                        timeout: Optional[float] = None) -> Optional[Dict]:
+        return self._private_client.wait_for_order(order_id, predicate, timeout)
+
+    def has_order_updates(self) -> bool:
+        return True
 
     def get_fills(self) -> List[Dict]:
-        return self.wsocket_client.get_fills()
+        return self._private_client.get_fills()
+
+    def get_fills_since(self, cursor: int = 0) -> Tuple[List[Dict], int]:
+        return self._private_client.get_fills_since(cursor)
 
     def get_trades(self, market: str) -> List[Dict]:
-        return self.wsocket_client.get_trades(market)
+        return self._market_client(market).get_trades(market)
+
+    def get_trades_array(self, market: str, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        return self._market_client(market).get_trades_array(market, since)
+
+    def get_bars(self, market: str, resolution: Union[str, int] = '1m', n: int = 60) -> numpy.ndarray:
+        return self._market_client(market).get_bars(market, resolution, n)
+
+    def seed_bars(self, market: str, resolution: Union[str, int], bars: Union[numpy.ndarray, 'pandas.DataFrame']) -> None:
+        self._market_client(market).seed_bars(market, resolution, bars)
+
+    def get_fills_array(self, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        return self._private_client.get_fills_array(since)
 
     def get_ticker(self, market: str) -> Dict:
-        return self.wsocket_client.get_ticker(market)
+        return self._market_client(market).get_ticker(market)
 
-    def get_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
-        return self.wsocket_client.get_orderbook(market)
-        
-    def get_cumulative_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
-        ob = self.get_orderbook(market)
+    def _channel_client(self, market: str, channel: str) -> FtxWebsocketClient:
+        return self._orderbook_client(market) if channel == 'orderbook' else self._market_client(market)
+
+    def get_sequence(self, market: str, channel: str = 'ticker') -> int:
+        return self._channel_client(market, channel).get_sequence(market, channel)
+
+    def wait_for_update(self, market: str, channel: str = 'ticker', after_seq: Optional[int] = None,
+                            timeout: Optional[float] = None) -> int:
+        return self._channel_client(market, channel).wait_for_update(market, channel, after_seq, timeout)
+
+    def get_bid_offer(self, market: str) -> Dict:
+        return self._orderbook_client(market).get_best_bid_offer(market)
+
+    def get_book_analytics(self, market: str) -> Optional[BookAnalytics]:
+        return self._orderbook_client(market).get_book_analytics(market)
 
-        bids = ob['bids']
-        asks = ob['asks']
+    def set_tick_size(self, market: str, tick_size: float) -> None:
+        self._orderbook_client(market).set_tick_size(market, tick_size)
 
-        bids = sorted(bids, key = lambda bid: bid[0])
-        bids = bids[::-1] # largest to smallest for the cumsum to work
-        bid_x = [bid[0] for bid in bids]
-        bid_y = [bid[1] for bid in bids]
-        bid_y = numpy.cumsum(bid_y)
+    def get_checksum_stats(self) -> Dict[str, int]:
+        stats = {'verified': 0, 'failed': 0, 'skipped': 0}
+        for client in self._clients():
+            for key, count in client.get_checksum_stats().items():
+                stats[key] += count
+        return stats
 
-        ob['bids'] = list(zip(bid_x, bid_y))
+    def get_feed_stats(self) -> Dict:
+        """
+            Feed statistics (see FtxWebsocketClient.get_feed_stats) over every connection.
+        """
+        stats = {'channels': defaultdict(dict), 'checksums': self.get_checksum_stats(), 'reconnects': 0}
+        reconnect_durations = LatencyHistogram()
+
+        for client in self._clients():
+            client_stats = client.get_feed_stats()
+            for channel, markets in client_stats['channels'].items():
+                stats['channels'][channel].update(markets)
+            stats['reconnects'] += client_stats['reconnects']
+            reconnect_durations.merge(client.get_reconnect_durations())
+
+        stats['channels'] = dict(stats['channels'])
+        stats['reconnect_duration'] = reconnect_durations.summary()
+        return stats
+
+    def get_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
+        return self._orderbook_client(market).get_orderbook(market)
+
+    def get_cumulative_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
+        return self._orderbook_client(market).get_cumulative_orderbook(market)
 
-        asks = sorted(asks, key = lambda ask: ask[0])
-        ask_x = [ask[0] for ask in asks]
-        ask_y = [ask[1] for ask in asks]
-        ask_y = numpy.cumsum(ask_y)
 
-        ob['asks'] = list(zip(ask_x, ask_y))
+    def get_depth(self, market: str) -> DepthView:
+        return self._orderbook_client(market).get_depth(market)
 
-        return ob
\ No newline at end of file
+    def get_live_depth(self, market: str) -> Optional[DepthView]:
+        return self._orderbook_client(market).get_live_depth(market)
\ No newline at end of file
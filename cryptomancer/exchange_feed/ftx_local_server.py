@@ -0,0 +1,204 @@
+import asyncio
+import json
+import random
+import time
+from threading import Thread
+from typing import Dict, List, Optional, Set, Tuple
+
+import websockets
+
+from cryptomancer.exchange_feed.ftx_synthetic_feed import FtxSyntheticFeed
+
+
+class FtxLocalServer(object):
+    """
+        A local stand-in for the FTX websocket API, serving synthetic data from
+        `FtxSyntheticFeed` so that `FtxWebsocketClient` (via `feed_endpoint`) can be
+        run and benchmarked without an exchange.
+
+        Speaks the subscribe / unsubscribe protocol for the ticker, trades and orderbook
+        channels: an orderbook subscription is answered with a partial, after which every
+        connection gets `rate` messages / sec (or as many as it can take if `rate` is None)
+        spread over what it subscribed to.  Login is accepted but private channels get no data.
+
+        To exercise the client's recovery paths, a connection can also be sent
+          - an `info` 20001 (please reconnect) frame and closed after every `reconnect_every` messages
+          - an `error` frame after every `error_every` messages
+          - an orderbook update with a bad checksum after every `corrupt_every` updates
+    """
+    def __init__(self, markets: List[str], rate: Optional[float] = 1000., host: str = '127.0.0.1', port: int = 0,
+                    depth: int = 100, seed: Optional[int] = None, reconnect_every: Optional[int] = None,
+                    error_every: Optional[int] = None, corrupt_every: Optional[int] = None):
+        self._markets = list(markets)
+        self._rate = rate
+        self._host = host
+        self._port = port
+        self._depth = depth
+        self._seed = seed
+        self._reconnect_every = reconnect_every
+        self._error_every = error_every
+        self._corrupt_every = corrupt_every
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._counts: Dict[str, int] = {'connections': 0, 'sent': 0, 'reconnects': 0, 'errors': 0, 'corrupted': 0}
+
+    def start(self) -> str:
+        """
+            Starts serving on a background thread and returns the url to connect to.
+        """
+        self._loop = asyncio.new_event_loop()
+        loop_thread = Thread(target = self._loop.run_forever)
+        loop_thread.daemon = True
+        loop_thread.start()
+
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+        return self.get_url()
+
+    async def _start(self) -> None:
+        self._server = await websockets.serve(self._handle, self._host, self._port, max_size = None)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def get_url(self) -> str:
+        return f'ws://{self._host}:{self._port}/ws/'
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    async def _handle(self, websocket, path: Optional[str] = None) -> None:
+        # `path` is only passed by older versions of websockets
+        self._counts['connections'] += 1
+
+        feed = FtxSyntheticFeed(self._markets, depth = self._depth, seed = self._seed)
+        subscriptions: Set[Tuple[str, str]] = set()
+        rng = random.Random(self._seed)
+
+        producer = asyncio.ensure_future(self._produce(websocket, feed, subscriptions, rng))
+        try:
+            async for raw_message in websocket:
+                for reply in self._reply(json.loads(raw_message), feed, subscriptions):
+                    await websocket.send(json.dumps(reply))
+
+        except websockets.ConnectionClosed:
+            pass
+
+        finally:
+            producer.cancel()
+
+    def _reply(self, message: Dict, feed: FtxSyntheticFeed, subscriptions: Set[Tuple[str, str]]) -> List[Dict]:
+        op = message.get('op')
+
+        if op == 'ping':
+            return [{'type': 'pong'}]
+
+        if op == 'login':
+            return []
+
+        if op not in {'subscribe', 'unsubscribe'}:
+            return [{'type': 'error', 'code': 400, 'msg': f'Invalid op {op}'}]
+
+        channel = message.get('channel')
+        market = message.get('market')
+
+        if channel in {'fills', 'orders'}:
+            return [{'type': f'{op}d', 'channel': channel}]
+
+        if channel not in {'ticker', 'trades', 'orderbook'} or market not in self._markets:
+            return [{'type': 'error', 'code': 404, 'msg': f'No such market: {market}'}]
+
+        reply = {'type': f'{op}d', 'channel': channel, 'market': market}
+
+        if op == 'unsubscribe':
+            if (channel, market) not in subscriptions:
+                return [{'type': 'error', 'code': 400, 'msg': 'Not subscribed'}]
+            subscriptions.discard((channel, market))
+            return [reply]
+
+        if (channel, market) in subscriptions:
+            return [{'type': 'error', 'code': 400, 'msg': 'Already subscribed'}]
+
+        subscriptions.add((channel, market))
+        if channel == 'orderbook':
+            return [reply, feed.orderbook_partial(market)]
+
+        return [reply]
+
+    def _next_message(self, feed: FtxSyntheticFeed, subscriptions: Set[Tuple[str, str]],
+                        rng: random.Random, n: int) -> Dict:
+        if self._reconnect_every and n % self._reconnect_every == 0:
+            self._counts['reconnects'] += 1
+            return {'type': 'info', 'code': 20001, 'msg': 'Server restarting, please reconnect'}
+
+        if self._error_every and n % self._error_every == 0:
+            self._counts['errors'] += 1
+            return {'type': 'error', 'code': 500, 'msg': 'Synthetic error'}
+
+        channel, market = rng.choice(sorted(subscriptions))
+
+        if channel == 'ticker':
+            return feed.ticker(market)
+        elif channel == 'trades':
+            return feed.trades(market, n_trades = rng.randint(1, 3))
+
+        message = feed.orderbook_update(market)
+        if self._corrupt_every and n % self._corrupt_every == 0:
+            self._counts['corrupted'] += 1
+            message['data']['checksum'] = (message['data']['checksum'] + 1) % 2**32
+        return message
+
+    async def _produce(self, websocket, feed: FtxSyntheticFeed, subscriptions: Set[Tuple[str, str]],
+                        rng: random.Random) -> None:
+        # send in small batches paced against the clock rather than sleeping per message
+        batch_period = 0.001
+        started_at = None
+        paced = 0
+        n = 0
+
+        while True:
+            if not subscriptions:
+                started_at = None
+                await asyncio.sleep(batch_period)
+                continue
+
+            if started_at is None:
+                started_at = time.time()
+                paced = 0
+
+            if self._rate is None:
+                batch_size = 100
+            else:
+                batch_size = int((time.time() - started_at) * self._rate) - paced
+                if batch_size <= 0:
+                    await asyncio.sleep(batch_period)
+                    continue
+
+            paced += batch_size
+
+            for _ in range(batch_size):
+                n += 1
+                message = self._next_message(feed, subscriptions, rng, n)
+                try:
+                    await websocket.send(json.dumps(message))
+                except websockets.ConnectionClosed:
+                    return
+                self._counts['sent'] += 1
+
+                if message['type'] == 'info':
+                    await websocket.close()
+                    return
+
+            # let the connection read subscriptions in between batches
+            await asyncio.sleep(0)
@@ -0,0 +1,117 @@
+import datetime
+import json
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from cryptomancer.exchange_feed.orderbook import OrderBook
+
+
+class FtxSyntheticFeed(object):
+    """
+        Generates FTX-format websocket messages (tickers, trades and orderbook
+        partials / updates carrying valid checksums) for a set of markets, so the
+        feed can be exercised and benchmarked without a live connection.
+
+        Each book is kept on a fixed grid of `depth` levels per side around a mid
+        price; updates resize, remove and re-add levels near the top of the book.
+    """
+    def __init__(self, markets: List[str], depth: int = 100, tick_size: float = 0.5,
+                    mid_price: float = 10000., seed: Optional[int] = None,
+                    clock: Callable[[], float] = time.time):
+        self._markets = list(markets)
+        self._depth = depth
+        self._tick_size = tick_size
+        self._mid_price = mid_price
+        self._random = random.Random(seed)
+        self._clock = clock
+
+        self._books: Dict[str, OrderBook] = {market: OrderBook() for market in self._markets}
+        self._trade_id = 0
+
+    def markets(self) -> List[str]:
+        return list(self._markets)
+
+    def _price(self, side: str, level: int) -> float:
+        offset = (level + 1) * self._tick_size
+        return round(self._mid_price - offset if side == 'bids' else self._mid_price + offset, 8)
+
+    def _size(self) -> float:
+        return round(self._random.uniform(0.001, 25.), 4)
+
+    def _orderbook_message(self, market: str, action: str, bids: List, asks: List) -> Dict:
+        book = self._books[market]
+        data = {'action': action, 'bids': bids, 'asks': asks, 'time': self._clock()}
+        book.apply(data)
+        data['checksum'] = book.checksum()
+
+        return {'channel': 'orderbook', 'market': market, 'type': action, 'data': data}
+
+    def orderbook_partial(self, market: str) -> Dict:
+        bids = [[self._price('bids', level), self._size()] for level in range(self._depth)]
+        asks = [[self._price('asks', level), self._size()] for level in range(self._depth)]
+        return self._orderbook_message(market, 'partial', bids, asks)
+
+    def orderbook_update(self, market: str, n_levels: int = 3) -> Dict:
+        book = self._books[market]
+        changes = {'bids': [], 'asks': []}
+
+        for _ in range(n_levels):
+            side = self._random.choice(['bids', 'asks'])
+            # updates cluster near the touch, like real order flow
+            level = min(int(self._random.expovariate(0.2)), self._depth - 1)
+            price = self._price(side, level)
+
+            present = price in (book.bids if side == 'bids' else book.asks)
+            size = 0 if present and self._random.random() < 0.2 else self._size()
+            changes[side].append([price, size])
+
+        return self._orderbook_message(market, 'update', changes['bids'], changes['asks'])
+
+    def ticker(self, market: str) -> Dict:
+        book = self._books[market]
+        best = book.get_best_bid_offer()
+        bid = best['bid'] if best['bid'] is not None else self._price('bids', 0)
+        ask = best['ask'] if best['ask'] is not None else self._price('asks', 0)
+
+        data = {'bid': bid, 'ask': ask, 'bidSize': best['bidSize'], 'askSize': best['askSize'],
+                'last': self._random.choice([bid, ask]), 'time': self._clock()}
+
+        return {'channel': 'ticker', 'market': market, 'type': 'update', 'data': data}
+
+    def trades(self, market: str, n_trades: int = 1) -> Dict:
+        best = self._books[market].get_best_bid_offer()
+        timestamp = datetime.datetime.fromtimestamp(self._clock(), tz = datetime.timezone.utc).isoformat()
+
+        data = []
+        for _ in range(n_trades):
+            self._trade_id += 1
+            side = self._random.choice(['buy', 'sell'])
+            price = (best['ask'] if side == 'buy' else best['bid']) or self._mid_price
+            data.append({'id': self._trade_id, 'price': price, 'size': self._size(), 'side': side,
+                            'liquidation': False, 'time': timestamp})
+
+        return {'channel': 'trades', 'market': market, 'type': 'update', 'data': data}
+
+    def next_message(self) -> Dict:
+        market = self._random.choice(self._markets)
+        if not self._books[market].timestamp:
+            return self.orderbook_partial(market)
+
+        draw = self._random.random()
+        if draw < 0.7:
+            return self.orderbook_update(market)
+        elif draw < 0.9:
+            return self.trades(market, n_trades = self._random.randint(1, 3))
+        else:
+            return self.ticker(market)
+
+    def frames(self, n: int) -> Iterator[str]:
+        """
+            Yields `n` raw frames, starting with an orderbook partial for every market.
+        """
+        for market in self._markets:
+            yield json.dumps(self.orderbook_partial(market))
+
+        for _ in range(n):
+            yield json.dumps(self.next_message())
@@ -1,26 +1,104 @@
 import sys
 import hmac
-import json
 import time
-import zlib
+import numpy
 from collections import defaultdict, deque
-from itertools import zip_longest
-from typing import DefaultDict, Deque, List, Dict, Tuple, Optional
-from gevent.event import Event
+from concurrent.futures import Executor
+from threading import Condition, Lock
+from typing import TYPE_CHECKING, Callable, DefaultDict, Deque, Iterable, List, Dict, Set, Tuple, Optional, Union
 
 from cryptomancer.exchange_feed.websocket_manager import WebsocketManager
+from cryptomancer.exchange_feed.orderbook import OrderBook, BookAnalytics
+from cryptomancer.exchange_feed.depth_view import DepthView
+from cryptomancer.exchange_feed.decoders import get_decoder
+from cryptomancer.exchange_feed.journal import JournalWriter
+from cryptomancer.exchange_feed.feed_stats import FeedStats, LatencyHistogram
+from cryptomancer.exchange_feed.bar_builder import BarBuilder
+from cryptomancer.exchange_feed.feed_queue import FeedQueue, create_queue
+from cryptomancer.exchange_feed.feed_callback import FeedCallback, create_callback
+from cryptomancer.exchange_feed.ring_buffer import RingBuffer, ObjectRingBuffer, TRADE_DTYPE, FILL_DTYPE, side_to_int, to_timestamp
+
+from loguru import logger
 
 import cryptomancer.local_secrets as local_secrets
 
+# for the seed_bars annotation only
+if TYPE_CHECKING:
+    import pandas
+
+FeedConsumer = Union[FeedQueue, FeedCallback]
+
 class FtxWebsocketClient(WebsocketManager):
     _ENDPOINT = 'wss://ftx.com/ws/'
-
-    def __init__(self, account: Optional[str] = None, feed_endpoint: Optional[str] = None) -> None:
+    _PRIVATE_CHANNELS = {'fills', 'orders'}
+    # channels whose messages carry an exchange timestamp in data['time']
+    _TIMESTAMPED_CHANNELS = {'ticker', 'orderbook'}
+
+    def __init__(self, account: Optional[str] = None, feed_endpoint: Optional[str] = None,
+                    checksum_interval: int = 1, checksum_period: Optional[float] = None,
+                    decoder: Optional[str] = None, trade_buffer_size: int = 10000,
+                    recorder: Optional[JournalWriter] = None, stats_log_interval: Optional[float] = None,
+                    bar_capacity: int = 1440, imbalance_levels: int = 10, pressure_halflife: float = 1.) -> None:
+        """
+            Orderbook checksums are verified on every partial and then on every
+            `checksum_interval`-th update per market or, if `checksum_period` is
+            given, at most once every `checksum_period` seconds per market.
+            A skipped update is still covered by the next verified checksum,
+            since FTX checksums the whole book after each update; until then it is
+            published to readers with `verified` False on its snapshots.
+
+            `decoder` selects the JSON decoder for incoming frames (see
+            `cryptomancer.exchange_feed.decoders`); defaults to the fastest installed.
+
+            Trades (per market) and fills are additionally kept in columnar ring buffers
+            of `trade_buffer_size` records, read incrementally through `get_trades_array`
+            and `get_fills_array`.
+
+            If a `recorder` is given, every raw frame received is appended to it, along
+            with its receive time, before being handled.
+
+            Message counts and latency histograms are kept per channel and market (see
+            `get_feed_stats`) and, if `stats_log_interval` is given, summarised in the log
+            every `stats_log_interval` seconds.
+
+            OHLCV bars (see `get_bars`) keep the last `bar_capacity` bars per market and resolution.
+
+            Book analytics (see `get_book_analytics`) measure imbalance over the top
+            `imbalance_levels` levels each side, and decay book pressure with a half-life of
+            `pressure_halflife` seconds.  Spreads are in ticks once `set_tick_size` is called.
+        """
         super().__init__()
         self._url = feed_endpoint if feed_endpoint is not None else self._ENDPOINT
+        self._decode = get_decoder(decoder)
+        self._recorder = recorder
+
+        self._feed_stats = FeedStats()
+        self._stats_log_interval = stats_log_interval
+        self._stats_logged_at = time.time()
+
+        self._channel_handlers: Dict[str, Callable[[Dict], None]] = {
+            'orderbook': self._handle_orderbook_message,
+            'trades': self._handle_trades_message,
+            'ticker': self._handle_ticker_message,
+            'fills': self._handle_fills_message,
+            'orders': self._handle_orders_message,
+        }
+
+        self._checksum_interval = max(1, checksum_interval)
+        self._checksum_period = checksum_period
+        self._checksum_counts: Dict[str, int] = {'verified': 0, 'failed': 0, 'skipped': 0}
 
         self._trades: DefaultDict[str, Deque] = defaultdict(lambda: deque([], maxlen=10000))
-        self._fills: Deque = deque([], maxlen=10000)
+        # fills as received, and the id of every order update, read by cursor
+        self._fills = ObjectRingBuffer(10000)
+        self._order_updates = ObjectRingBuffer(10000)
+        self._trade_buffers: DefaultDict[str, RingBuffer] = defaultdict(
+            lambda: RingBuffer(TRADE_DTYPE, trade_buffer_size))
+        self._fill_buffer = RingBuffer(FILL_DTYPE, trade_buffer_size)
+        self._bars = BarBuilder(bar_capacity)
+        self._imbalance_levels = imbalance_levels
+        self._pressure_halflife = pressure_halflife
+        self._tick_sizes: Dict[str, float] = {}
         self._api_key = ''
         self._api_secret = ''
         self._subaccount = None
@@ -31,26 +109,70 @@ class FtxWebsocketClient(WebsocketManager):
             self._api_secret = secret['API_SECRET']
             self._subaccount = secret['SUBACCOUNT']
     
-        self._orderbook_update_events: DefaultDict[str, Event] = defaultdict(Event)
+        # per (channel, market) update counters; never reset, so sequence numbers
+        # keep increasing across reconnects and orderbook resyncs
+        self._sequences: DefaultDict[Tuple[str, str], int] = defaultdict(int)
+
+        # one condition per (channel, market) and per ('orders', order id),
+        # notified whenever new data arrives for that key
+        self._conditions: Dict[Tuple, Condition] = {}
+        self._conditions_lock = Lock()
+
+        # what has been sent on the current connection: (channel, market) for each
+        # subscription and ('login', None), so nothing is sent twice on one connection
+        self._live_ws = None
+        self._live_keys: Set[Tuple[str, Optional[str]]] = set()
+        self._live_lock = Lock()
+
+        # time from losing a connection to having resubscribed on the next one
+        self._reconnect_durations = LatencyHistogram()
+
+        # consumer queues and callbacks by channel; replaced rather than mutated,
+        # so the websocket thread can iterate them without taking the lock
+        self._consumers: Dict[str, Tuple[FeedConsumer, ...]] = {}
+        self._consumers_lock = Lock()
+
         self._reset_data()
 
 
     def _on_open(self, ws):
-        self._reset_data()
+        """
+            Restores the session on a new connection: logs back in if we were logged in and
+            resends every subscription in one burst.  Last known tickers and books are kept,
+            flagged as stale until the new connection refreshes them, so readers are not
+            left waiting on a partial after a reconnect.
+        """
+        reconnecting = self._disconnected_at is not None
+
+        if reconnecting:
+            for market, ticker in list(self._tickers.items()):
+                if ticker:
+                    self._tickers[market] = dict(ticker, stale = True)
+            for orderbook in list(self._orderbooks.values()):
+                orderbook.stale = True
+
+        messages = []
+        if self._logged_in:
+            messages.append((('login', None), self._login_message()))
+        for channel, market in sorted(self._subscriptions, key = lambda key: (key[0], key[1] or '')):
+            messages.append(((channel, market), self._subscription_message('subscribe', channel, market)))
+
+        self._send_once(ws, messages)
+
+        if reconnecting:
+            self._reconnect_durations.record(time.time() - self._disconnected_at)
+            self._disconnected_at = None
 
 
     def _reset_data(self) -> None:
-        self._subscriptions: List[Dict] = []
+        # keyed by (channel, market); market is None for the private channels
+        self._subscriptions: Set[Tuple[str, Optional[str]]] = set()
 
         self._orders: DefaultDict[int, Dict] = defaultdict(dict)
         self._tickers: DefaultDict[str, Dict] = defaultdict(dict)
-        
-        self._orderbook_timestamps: DefaultDict[str, float] = defaultdict(float)
-        self._orderbook_timestamps.clear()
 
-        self._orderbook_update_events.clear()
-        self._orderbooks: DefaultDict[str, Dict[str, DefaultDict[float, float]]] = defaultdict(
-            lambda: {side: defaultdict(float) for side in {'bids', 'asks'}})
+        self._orderbooks: DefaultDict[str, OrderBook] = defaultdict(
+            lambda: OrderBook(self._imbalance_levels, self._pressure_halflife))
 
         self._logged_in = False
         self._last_received_orderbook_data_at: float = 0.0
@@ -58,16 +180,15 @@ class FtxWebsocketClient(WebsocketManager):
 
     def _reset_orderbook(self, market: str) -> None:
         if market in self._orderbooks:
+            # publish the empty book to anyone still holding on to it
+            self._orderbooks[market].clear()
             del self._orderbooks[market]
-        
-        if market in self._orderbook_timestamps:
-            del self._orderbook_timestamps[market]
 
 
     def _get_url(self) -> str:
         return self._url
 
-    def _login(self) -> None:
+    def _login_message(self) -> Dict:
         ts = int(time.time() * 1000)
         args = {
             'key': self._api_key,
@@ -75,159 +196,632 @@ class FtxWebsocketClient(WebsocketManager):
                 self._api_secret.encode(), f'{ts}websocket_login'.encode(), 'sha256').hexdigest(),
             'time': ts,
         }
-        if not self._sub_account:
-            args['subaccount'] = self._sub_account
-            
-        self.send_json({'op': 'login', 'args': args})
+        if self._subaccount:
+            args['subaccount'] = self._subaccount
+
+        return {'op': 'login', 'args': args}
+
+
+    def _login(self) -> None:
+        self._send([(('login', None), self._login_message())])
         self._logged_in = True
 
 
-    def _subscribe(self, subscription: Dict) -> None:
-        self.send_json({'op': 'subscribe', **subscription})
-        self._subscriptions.append(subscription)
+    def _send_once(self, ws, messages: List[Tuple[Tuple[str, Optional[str]], Dict]]) -> None:
+        # sends each (key, message) not already sent on connection `ws`
+        with self._live_lock:
+            if self._live_ws is not ws:
+                self._live_ws = ws
+                self._live_keys = set()
+
+            for key, message in messages:
+                if key not in self._live_keys:
+                    self._live_keys.add(key)
+                    self.send_json(message)
+
+
+    def _send(self, messages: List[Tuple[Tuple[str, Optional[str]], Dict]]) -> None:
+        # while disconnected nothing is sent; `_on_open` sends the whole session once connected
+        self.connect()
+
+        ws = self.ws
+        if ws is not None:
+            self._send_once(ws, messages)
+
+
+    def _subscription_message(self, op: str, channel: str, market: Optional[str]) -> Dict:
+        if market is None:
+            return {'op': op, 'channel': channel}
+        return {'op': op, 'channel': channel, 'market': market}
+
+
+    def _is_subscribed(self, channel: str, market: Optional[str] = None) -> bool:
+        return (channel, market) in self._subscriptions
+
+
+    def _ensure_subscribed(self, channel: str, market: Optional[str] = None) -> None:
+        if (channel, market) not in self._subscriptions:
+            self._subscribe(channel, market)
+
+
+    def _subscribe(self, channel: str, market: Optional[str] = None) -> None:
+        # register before sending so the first messages on the
+        # channel are not dropped as unsubscribed
+        self._subscriptions.add((channel, market))
+        self._send([((channel, market), self._subscription_message('subscribe', channel, market))])
+
+
+    def _unsubscribe(self, channel: str, market: Optional[str] = None) -> None:
+        self._subscriptions.discard((channel, market))
+
+        with self._live_lock:
+            if self._live_ws is self.ws and (channel, market) in self._live_keys:
+                self._live_keys.discard((channel, market))
+                self.send_json(self._subscription_message('unsubscribe', channel, market))
+
+
+    def subscribe_many(self, markets: Iterable[str], channels: Iterable[str]) -> None:
+        """
+            Subscribe to every channel in `channels` for every market in `markets` in one burst.
+            Private channels (fills, orders) are subscribed once, independent of `markets`.
+        """
+        markets = list(markets)
+        keys = []
+
+        for channel in channels:
+            for market in ([None] if channel in self._PRIVATE_CHANNELS else markets):
+                if (channel, market) not in self._subscriptions:
+                    self._subscriptions.add((channel, market))
+                    keys.append((channel, market))
+
+        if not keys:
+            return
+
+        if any(channel in self._PRIVATE_CHANNELS for channel, _ in keys) and not self._logged_in:
+            self._login()
+
+        self._send([((channel, market), self._subscription_message('subscribe', channel, market))
+                        for channel, market in keys])
+
+
+    def add_consumer(self, consumer: FeedConsumer) -> None:
+        with self._consumers_lock:
+            self._consumers[consumer.channel] = self._consumers.get(consumer.channel, ()) + (consumer,)
+
+
+    def remove_consumer(self, consumer: FeedConsumer) -> None:
+        with self._consumers_lock:
+            self._consumers[consumer.channel] = tuple(c for c in self._consumers.get(consumer.channel, ())
+                                                        if c is not consumer)
+
+
+    def subscribe_queue(self, channel: str, markets: Optional[Iterable[str]] = None, capacity: int = 10000) -> FeedQueue:
+        """
+            Returns a new queue receiving every `channel` update for `markets` (or for every
+            market subscribed on this connection, if None), subscribing to them if needed.
+            See `cryptomancer.exchange_feed.feed_queue.create_queue` for how a queue that
+            is not kept up with behaves.
+        """
+        queue = create_queue(channel, markets, capacity)
+        self.add_consumer(queue)
+
+        if markets is not None or channel in self._PRIVATE_CHANNELS:
+            self.subscribe_many(markets or [], [channel])
+
+        return queue
+
 
+    def unsubscribe_queue(self, queue: FeedQueue) -> None:
+        self.remove_consumer(queue)
 
-    def _unsubscribe(self, subscription: Dict) -> None:
-        self.send_json({'op': 'unsubscribe', **subscription})
-        while subscription in self._subscriptions:
-            self._subscriptions.remove(subscription)
+
+    def _add_callback(self, channel: str, market: Optional[str], fn: Callable,
+                        executor: Optional[Executor]) -> FeedCallback:
+        markets = [market] if market is not None else None
+        callback = create_callback(channel, markets, fn, executor)
+        self.add_consumer(callback)
+        self.subscribe_many(markets or [], [channel])
+        return callback
+
+
+    def on_ticker(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Calls `fn(market, ticker)` on every ticker update for `market`, subscribing to it
+            if needed.  See `cryptomancer.exchange_feed.feed_callback.FeedCallback` for
+            how `fn` is run, with or without an `executor`.
+        """
+        return self._add_callback('ticker', market, fn, executor)
+
+
+    def on_book(self, market: str, fn: Callable[[str, DepthView], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Calls `fn(market, depth)` with a DepthView snapshot after every published
+            orderbook update for `market` (see `DepthView.verified`).
+        """
+        return self._add_callback('orderbook', market, fn, executor)
+
+
+    def on_trade(self, market: str, fn: Callable[[str, Dict], None],
+                    executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Calls `fn(market, trade)` for every trade in `market`.
+        """
+        return self._add_callback('trades', market, fn, executor)
+
+
+    def on_fill(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Calls `fn(fill)` for every fill on the account, logging in if needed.
+        """
+        return self._add_callback('fills', None, fn, executor)
+
+
+    def on_order(self, fn: Callable[[Dict], None], executor: Optional[Executor] = None) -> FeedCallback:
+        """
+            Calls `fn(order)` on every update to an order on the account, logging in if needed.
+        """
+        return self._add_callback('orders', None, fn, executor)
+
+
+    def remove_callback(self, callback: FeedCallback) -> None:
+        self.remove_consumer(callback)
+
+
+    def _dispatch_event(self, channel: str, market: Optional[str], data) -> None:
+        for consumer in self._consumers.get(channel, ()):
+            if consumer.accepts(market):
+                consumer.put(market, data)
 
 
     def get_fills(self) -> List[Dict]:
         if not self._logged_in:
             self._login()
 
-        subscription = {'channel': 'fills'}
+        self._ensure_subscribed('fills')
+
+        return self._fills.since(0)[0]
+
+
+    def get_fills_since(self, cursor: int = 0) -> Tuple[List[Dict], int]:
+        """
+            Returns the fills received after `cursor` (of the last 10,000), along with
+            the cursor to pass in next time.
+        """
+        if not self._logged_in:
+            self._login()
+
+        self._ensure_subscribed('fills')
+
+        return self._fills.since(cursor)
 
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
 
-        return list(self._fills.copy())
+    def get_fills_array(self, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        if not self._logged_in:
+            self._login()
+
+        self._ensure_subscribed('fills')
+
+        return self._fill_buffer.since(since)
 
 
     def get_orders(self) -> Dict[int, Dict]:
         if not self._logged_in:
             self._login()
         
-        subscription = {'channel': 'orders'}
-        
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
+        self._ensure_subscribed('orders')
         
         return dict(self._orders.copy())
 
 
-    def get_trades(self, market: str) -> List[Dict]:
-        subscription = {'channel': 'trades', 'market': market}
+    def get_orders_changed_since(self, cursor: int = 0) -> Tuple[Dict[int, Dict], int]:
+        """
+            Returns the current state of every order updated after `cursor` (within the
+            last 10,000 updates), by order id, along with the cursor to pass in next time.
+        """
+        if not self._logged_in:
+            self._login()
+
+        self._ensure_subscribed('orders')
+
+        order_ids, cursor = self._order_updates.since(cursor)
+        orders = self._orders
+        return {order_id: orders[order_id] for order_id in dict.fromkeys(order_ids) if order_id in orders}, cursor
+
+
+    def get_orders_cursor(self) -> Optional[int]:
+        """
+            Returns the cursor past the latest order update, for `get_orders_changed_since`,
+            or None if orders are not subscribed; unlike the getters, it never subscribes.
+        """
+        if not self._is_subscribed('orders'):
+            return None
+        return self._order_updates.cursor()
+
+
+    def get_fills_cursor(self) -> Optional[int]:
+        """
+            Returns the cursor past the latest fill, for `get_fills_since` and
+            `get_fills_array`, or None if fills are not subscribed; unlike the getters, it
+            never subscribes.
+        """
+        if not self._is_subscribed('fills'):
+            return None
+        return self._fill_buffer.cursor()
+
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        if not self._logged_in:
+            self._login()
+
+        self._ensure_subscribed('orders')
+
+        return self._orders.get(order_id)
+
+
+    def _get_condition(self, key: Tuple) -> Condition:
+        with self._conditions_lock:
+            condition = self._conditions.get(key)
+            if condition is None:
+                condition = self._conditions[key] = Condition()
+            return condition
+
+
+    def wait_for_order(self, order_id: int, predicate: Callable[[Dict], bool], 
+                        timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+            Blocks until the orders channel reports a state of `order_id` satisfying `predicate`
+            or `timeout` seconds pass, then returns the latest known state of the order (if any).
+        """
+        if not self._logged_in:
+            self._login()
+
+        self._ensure_subscribed('orders')
 
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
+        def ready() -> bool:
+            order = self._orders.get(order_id)
+            return order is not None and predicate(order)
+
+        condition = self._get_condition(('orders', order_id))
+        with condition:
+            condition.wait_for(ready, timeout)
+
+        return self._orders.get(order_id)
+
+
+    def get_trades(self, market: str) -> List[Dict]:
+        self._ensure_subscribed('trades', market)
 
         trades = list(self._trades[market].copy())
         self._trades[market].clear()
         return trades
 
 
-    def get_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
-        subscription = {'channel': 'orderbook', 'market': market}
-        
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
+    def get_trades_array(self, market: str, since: int = 0) -> Tuple[numpy.ndarray, int]:
+        """
+            Returns the trades recorded after cursor `since` as a TRADE_DTYPE array, along
+            with the cursor to pass on the next call.  Unlike `get_trades`, reading does not
+            consume the trades for other callers.
+        """
+        self._ensure_subscribed('trades', market)
+
+        return self._trade_buffers[market].since(since)
+
+
+    def get_bars(self, market: str, resolution: Union[str, int] = '1m', n: int = 60) -> numpy.ndarray:
+        """
+            Returns the last `n` OHLCV bars (BAR_DTYPE, oldest first, the last one still
+            open) of `market` at `resolution` ('1s', '1m', '5m', '1h' or seconds).
+
+            Bars are built from trades once first asked for, starting from the trades
+            already buffered (see `get_trades_array`) or from `seed_bars`.
+        """
+        self._ensure_subscribed('trades', market)
+
+        if not self._bars.has_series(market, resolution):
+            self._bars.add_series(market, resolution, self._trade_buffers[market])
+
+        return self._bars.get_bars(market, resolution, n)
+
+
+    def seed_bars(self, market: str, resolution: Union[str, int], bars: Union[numpy.ndarray, 'pandas.DataFrame']) -> None:
+        """
+            Seeds `market` bars at `resolution` with history (e.g. `SecurityMaster.get_prices`),
+            so that `get_bars` has more than what was traded since subscribing.
+        """
+        self._bars.seed(market, resolution, bars)
+
+
+    def _get_subscribed_orderbook(self, market: str) -> OrderBook:
+        self._ensure_subscribed('orderbook', market)
         
-        if self._orderbook_timestamps[market] == 0:
+        if self._orderbooks[market].timestamp == 0:
             self.wait_for_orderbook_update(market, 5)
-        
-        return {
-            side: sorted(
-                [(price, quantity) for price, quantity in list(self._orderbooks[market][side].items())
-                 if quantity],
-                key=lambda order: order[0] * (-1 if side == 'bids' else 1)
-            )
-            for side in {'bids', 'asks'}
-        }
+
+        return self._orderbooks[market]
+
+
+    def get_orderbook(self, market: str, depth: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        return self._get_subscribed_orderbook(market).get_orderbook(depth)
+
+
+    def get_cumulative_orderbook(self, market: str, depth: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        return self._get_subscribed_orderbook(market).get_cumulative_orderbook(depth)
+
+
+    def get_depth(self, market: str) -> DepthView:
+        """
+            Returns a consistent, read-only snapshot of the latest published book for `market`;
+            it is shared by every caller until the book next changes.  Its `verified` is
+            False if the checksum of the update was not checked (see checksum_interval).
+        """
+        return self._get_subscribed_orderbook(market).snapshot()
+
+
+    def get_live_depth(self, market: str) -> Optional[DepthView]:
+        """
+            Like `get_depth`, but never subscribes or waits: None unless the book for
+            `market` is already being received.
+        """
+        if not self._is_subscribed('orderbook', market):
+            return None
+
+        orderbook = self._orderbooks.get(market)
+        if orderbook is None or orderbook.timestamp == 0:
+            return None
+        return orderbook.snapshot()
+
+
+    def get_best_bid_offer(self, market: str) -> Dict:
+        best_bid_offer = self._get_subscribed_orderbook(market).get_best_bid_offer()
+        best_bid_offer['sequence'] = self._sequences[('orderbook', market)]
+        return best_bid_offer
+
+
+    def get_book_analytics(self, market: str) -> Optional[BookAnalytics]:
+        """
+            Returns the microprice, top-of-book imbalance, spread and book pressure of the
+            latest published book for `market`, as maintained on every update; None while
+            either side of the book is empty.
+        """
+        return self._get_subscribed_orderbook(market).analytics
+
+
+    def set_tick_size(self, market: str, tick_size: float) -> None:
+        self._tick_sizes[market] = tick_size
+        if market in self._orderbooks:
+            self._orderbooks[market].tick_size = tick_size
 
 
     def get_orderbook_timestamp(self, market: str) -> float:
-        return self._orderbook_timestamps[market]
+        return self._orderbooks[market].timestamp
 
 
     def wait_for_orderbook_update(self, market: str, timeout: Optional[float]) -> None:
-        subscription = {'channel': 'orderbook'}
-        
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        
-        self._orderbook_update_events[market].wait(timeout)
+        self.wait_for_update(market, 'orderbook', timeout = timeout)
 
 
     def get_ticker(self, market: str) -> Dict:
-        subscription = {'channel': 'ticker', 'market': market}
-
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
+        self._ensure_subscribed('ticker', market)
 
         return self._tickers[market]
 
 
+    def get_sequence(self, market: str, channel: str = 'ticker') -> int:
+        """
+            Returns the number of updates received so far on `channel` for `market`;
+            0 if nothing has been received yet.
+        """
+        return self._sequences[(channel, market)]
+
+
+    def wait_for_update(self, market: str, channel: str = 'ticker', after_seq: Optional[int] = None,
+                            timeout: Optional[float] = None) -> int:
+        """
+            Blocks until `channel` ('ticker', 'orderbook' or 'trades') has data for `market`
+            with a sequence number greater than `after_seq` (by default, the current sequence,
+            i.e. the next update), or until `timeout` seconds pass.
+
+            Returns the latest sequence number, which can be passed back in as `after_seq`.
+        """
+        self._ensure_subscribed(channel, market)
+
+        key = (channel, market)
+        condition = self._get_condition(key)
+        with condition:
+            if after_seq is None:
+                after_seq = self._sequences[key]
+            condition.wait_for(lambda: self._sequences[key] > after_seq, timeout)
+            return self._sequences[key]
+
+
+    def _publish_update(self, channel: str, market: str) -> int:
+        key = (channel, market)
+        condition = self._get_condition(key)
+        with condition:
+            self._sequences[key] += 1
+            condition.notify_all()
+        return self._sequences[key]
+
+
     def _handle_orderbook_message(self, message: Dict) -> None:
         market = message['market']
-        subscription = {'channel': 'orderbook', 'market': market}
-        
-        if subscription not in self._subscriptions:
+        if not self._is_subscribed('orderbook', market):
             return
         
         data = message['data']
 
+        orderbook = self._orderbooks[market]
+
+        # after a reset, updates queued ahead of the new partial cannot be applied
+        if orderbook.timestamp == 0 and data['action'] != 'partial':
+            return
+
         if data['action'] == 'partial':
-            self._reset_orderbook(market)
-        
-        for side in {'bids', 'asks'}:
-            book = self._orderbooks[market][side]
-        
-            for price, size in data[side]:
-                if size:
-                    book[price] = size
-                else:
-                    del book[price]
-        
-            self._orderbook_timestamps[market] = data['time']
-        
-        checksum = data['checksum']
-        orderbook = self.get_orderbook(market)
-        checksum_data = [
-            ':'.join([f'{float(order[0])}:{float(order[1])}' for order in (bid, offer) if order])
-            for (bid, offer) in zip_longest(orderbook['bids'][:100], orderbook['asks'][:100])
-        ]
-        computed_result = int(zlib.crc32(':'.join(checksum_data).encode()))
-
-        if computed_result != checksum:
-            self._last_received_orderbook_data_at = 0
-            self._reset_orderbook(market)
-            self._unsubscribe({'market': market, 'channel': 'orderbook'})
-            self._subscribe({'market': market, 'channel': 'orderbook'})
-        
+            orderbook.tick_size = self._tick_sizes.get(market)
+
+        # readers only see the update once it has been verified (or verification skipped)
+        try:
+            orderbook.apply(data, publish = False)
+
+            verify = self._should_verify_checksum(orderbook, data['action'])
+            if verify:
+                orderbook.unverified_updates = 0
+                orderbook.verified_at = time.time()
+                checksum_failed = orderbook.checksum() != data['checksum']
+
+        except Exception:
+            # a half applied update must not be published, but readers must not be left
+            # waiting on it either: drop the book until a fresh partial arrives
+            self._resubscribe_orderbook(market)
+            raise
+
+        if verify:
+            if checksum_failed:
+                self._checksum_counts['failed'] += 1
+                self._resubscribe_orderbook(market)
+                return
+
+            self._checksum_counts['verified'] += 1
+
         else:
-            self._orderbook_update_events[market].set()
-            self._orderbook_update_events[market].clear()
+            self._checksum_counts['skipped'] += 1
+
+        orderbook.verified = verify
+        orderbook.publish()
+        self._publish_update('orderbook', market)
+        self._dispatch_event('orderbook', market, orderbook)
+
+
+    def _resubscribe_orderbook(self, market: str) -> None:
+        self._last_received_orderbook_data_at = 0
+        self._reset_orderbook(market)
+        self._unsubscribe('orderbook', market)
+        self._subscribe('orderbook', market)
+
+
+    def _should_verify_checksum(self, orderbook: OrderBook, action: str) -> bool:
+        if action == 'partial':
+            return True
+
+        orderbook.unverified_updates += 1
+
+        if self._checksum_period is not None:
+            return time.time() - orderbook.verified_at >= self._checksum_period
+
+        return orderbook.unverified_updates >= self._checksum_interval
+
+
+    def get_checksum_stats(self) -> Dict[str, int]:
+        return dict(self._checksum_counts)
+
+
+    def get_reconnect_durations(self) -> LatencyHistogram:
+        """
+            A copy of the histogram summarised as `reconnect_duration` in `get_feed_stats`,
+            e.g. to merge with those of other connections.
+        """
+        durations = LatencyHistogram()
+        durations.merge(self._reconnect_durations)
+        return durations
+
+
+    def get_feed_stats(self) -> Dict:
+        """
+            Returns
+                - channels: {channel: {market: {messages, network, handling}}}, where network
+                  (exchange timestamp -> received; ticker and orderbook only) and handling
+                  (received -> handled) summarise latency histograms in seconds
+                - checksums: orderbook checksums verified / failed / skipped
+                - reconnects: number of times the connection was dropped or restarted
+                - reconnect_duration: seconds from a connection dropping to having
+                  resubscribed on the next one
+        """
+        return {
+            'channels': self._feed_stats.summary(),
+            'checksums': self.get_checksum_stats(),
+            'reconnects': self._reconnect_count,
+            'reconnect_duration': self._reconnect_durations.summary(),
+        }
+
+
+    def _record_feed_stats(self, message: Dict, received_at: float) -> None:
+        handled_at = time.time()
+        channel = message['channel']
+        exchange_time = message['data'].get('time') if channel in self._TIMESTAMPED_CHANNELS else None
+        self._feed_stats.record(channel, message.get('market'), exchange_time, received_at, handled_at)
+
+        if self._stats_log_interval is not None and handled_at - self._stats_logged_at >= self._stats_log_interval:
+            self._stats_logged_at = handled_at
+            logger.info(f'Feed {self._url} | {self._feed_stats.log_line()} | '
+                        f'{self._checksum_counts["failed"]} checksum failures, {self._reconnect_count} reconnects')
 
    
     def _handle_trades_message(self, message: Dict) -> None:
+        market = message['market']
+        trades = self._trades[market]
+        trade_buffer = self._trade_buffers[market]
+
         for trade in message['data']:
-            self._trades[message['market']].append(trade)
+            trades.append(trade)
+            timestamp = to_timestamp(trade['time'])
+            trade_buffer.append((timestamp, trade['price'], trade['size'],
+                                    side_to_int(trade['side']), trade['liquidation']))
+            self._bars.add_trade(market, timestamp, trade['price'], trade['size'], trade_buffer.cursor())
+            self._dispatch_event('trades', market, trade)
+
+        self._publish_update('trades', market)
     
     def _handle_ticker_message(self, message: Dict) -> None:
-        self._tickers[message['market']] = message['data']
+        market = message['market']
+        data = message['data']
+        data['stale'] = False
+        # sequence the ticker before publishing it, so a reader that sees
+        # the new dict also sees its sequence number
+        data['sequence'] = self._sequences[('ticker', market)] + 1
+        self._tickers[market] = data
+        self._publish_update('ticker', market)
+        self._dispatch_event('ticker', market, data)
     
     def _handle_fills_message(self, message: Dict) -> None:
-        for fill in message['data']:
+        # FTX sends one fill per message; accept a list as well
+        data = message['data']
+        fills = data if isinstance(data, list) else [data]
+
+        for fill in fills:
             self._fills.append(fill)
+            self._fill_buffer.append((to_timestamp(fill['time']), fill['market'], fill['orderId'], fill['price'],
+                                        fill['size'], side_to_int(fill['side']), fill['fee'],
+                                        fill['liquidity'] == 'taker'))
+            self._dispatch_event('fills', fill['market'], fill)
     
     def _handle_orders_message(self, message: Dict) -> None:
         data = message['data']
-        self._orders.update({data['id']: data})
+        order_id = data['id']
+
+        condition = self._get_condition(('orders', order_id))
+        with condition:
+            self._orders[order_id] = data
+            condition.notify_all()
+
+        self._order_updates.append(order_id)
+
+        self._dispatch_event('orders', data['market'], data)
+
+        # nothing changes once an order is closed; late waiters see the closed
+        # state immediately, so the condition can be dropped
+        if data['status'] == 'closed':
+            with self._conditions_lock:
+                self._conditions.pop(('orders', order_id), None)
     
-    def _on_message(self, ws, raw_message: str) -> None:
-        message = json.loads(raw_message)
+    def _on_message(self, ws, raw_message: Union[str, bytes]) -> None:
+        received_at = time.time()
+
+        if self._recorder is not None:
+            self._recorder.record(raw_message)
+
+        message = self._decode(raw_message)
         
         message_type = message['type']
         
@@ -241,19 +835,8 @@ class FtxWebsocketClient(WebsocketManager):
         elif message_type == 'error':
             raise Exception(message)
         
-        channel = message['channel']
+        handler = self._channel_handlers.get(message.get('channel'))
 
-        if channel == 'orderbook':
-            self._handle_orderbook_message(message)
-        
-        elif channel == 'trades':
-            self._handle_trades_message(message)
-        
-        elif channel == 'ticker':
-            self._handle_ticker_message(message)
-        
-        elif channel == 'fills':
-            self._handle_fills_message(message)
-        
-        elif channel == 'orders':
-            self._handle_orders_message(message)
\ No newline at end of file
+        if handler is not None:
+            handler(message)
+            self._record_feed_stats(message, received_at)
@@ -0,0 +1,239 @@
+import os
+import mmap
+import glob
+import queue
+import struct
+import time
+from threading import Thread
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+
+# every frame is prefixed with its receive time (float64 seconds since the epoch)
+# and payload length (uint32), little endian
+_HEADER = struct.Struct('<dI')
+
+_SUFFIX = '.journal'
+
+# a finished segment's earliest and latest receive times (float64 seconds), written
+# next to it as <segment>.range
+_RANGE = struct.Struct('<dd')
+_RANGE_SUFFIX = '.range'
+
+
+def _segment_micros(path: str) -> int:
+    # segments are named <prefix>-<start time in microseconds>.journal
+    return int(os.path.basename(path)[:-len(_SUFFIX)].rsplit('-', 1)[1])
+
+
+def _read_range(path: str) -> Optional[Tuple[float, float]]:
+    # None for a segment still being written, or one whose writer never finished it
+    try:
+        with open(path + _RANGE_SUFFIX, 'rb') as f:
+            return _RANGE.unpack(f.read())
+    except (OSError, struct.error):
+        return None
+
+
+class JournalWriter(object):
+    """
+        Appends raw feed frames to an append-only, length-prefixed binary journal in
+        `directory`, starting a new segment file once the current one reaches
+        `segment_size` bytes.
+
+        `record` only puts the frame on a bounded queue; a background thread does the
+        writing.  If the queue is full (the disk cannot keep up) the frame is dropped and
+        counted rather than blocking the websocket thread.
+
+        Segments are named by the time they were started, kept increasing even if the
+        clock steps backwards so that their names sort in the order they were written.
+        Once finished, the earliest and latest receive times in a segment are written
+        alongside it (see `JournalReader`).
+
+        If a write fails the error is logged and kept in `error`, and every frame from then
+        on is dropped: the queue is still drained, so neither `record` nor `close` block.
+    """
+    _STOP = object()
+
+    def __init__(self, directory: str, prefix: str = 'ftx', segment_size: int = 256 * 1024 * 1024,
+                    queue_size: int = 100000):
+        self._directory = directory
+        self._prefix = prefix
+        self._segment_size = segment_size
+
+        self._queue: queue.Queue = queue.Queue(maxsize = queue_size)
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_range: Optional[Tuple[float, float]] = None
+
+        self.error: Optional[Exception] = None
+
+        self._counts: Dict[str, int] = {'recorded': 0, 'dropped': 0, 'segments': 0}
+
+        os.makedirs(directory, exist_ok = True)
+        self._segment_micros = max((_segment_micros(path) for path in JournalReader(directory, prefix).segments()),
+                                    default = -1)
+
+        self._thread = Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, payload: Union[str, bytes], timestamp: Optional[float] = None) -> None:
+        if self.error is not None:
+            self._counts['dropped'] += 1
+            return
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        try:
+            self._queue.put_nowait((timestamp, payload))
+        except queue.Full:
+            self._counts['dropped'] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    def close(self) -> None:
+        """
+            Writes out everything recorded so far and stops the writer thread.  Check
+            `error` afterwards for whether everything was written.
+        """
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _open_segment(self, timestamp: float) -> None:
+        self._close_segment()
+
+        self._segment_micros = max(int(timestamp * 1e6), self._segment_micros + 1)
+        path = os.path.join(self._directory, f'{self._prefix}-{self._segment_micros:020d}{_SUFFIX}')
+        self._file = open(path, 'ab')
+        self._segment_bytes = self._file.tell()
+        self._counts['segments'] += 1
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+
+        self._file.close()
+        if self._segment_range is not None:
+            # written whole and then renamed, so a reader never sees part of it
+            path = self._file.name + _RANGE_SUFFIX
+            with open(path + '.tmp', 'wb') as f:
+                f.write(_RANGE.pack(*self._segment_range))
+            os.replace(path + '.tmp', path)
+
+        self._file = None
+        self._segment_range = None
+
+    def _write(self, timestamp: float, payload: Union[str, bytes]) -> None:
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        size = _HEADER.size + len(payload)
+        if self._file is None or (self._segment_bytes > 0 and self._segment_bytes + size > self._segment_size):
+            self._open_segment(timestamp)
+
+        self._file.write(_HEADER.pack(timestamp, len(payload)))
+        self._file.write(payload)
+        self._segment_bytes += size
+        self._counts['recorded'] += 1
+
+        # receive times are wall clock times, so the first frame is not always the earliest
+        if self._segment_range is None:
+            self._segment_range = (timestamp, timestamp)
+        else:
+            self._segment_range = (min(self._segment_range[0], timestamp), max(self._segment_range[1], timestamp))
+
+    def _fail(self, error: Exception) -> None:
+        logger.error(f'Journal {self._directory} | Writing failed, dropping every frame from now on: {error!r}')
+        self.error = error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+
+            # write whatever else is already queued before flushing
+            while item is not self._STOP:
+                if self.error is None:
+                    try:
+                        self._write(*item)
+                    except Exception as e:
+                        self._fail(e)
+
+                if self.error is not None:
+                    self._counts['dropped'] += 1
+
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if self.error is None:
+                try:
+                    if item is self._STOP:
+                        self._close_segment()
+                    elif self._file is not None:
+                        self._file.flush()
+                except Exception as e:
+                    self._fail(e)
+
+            if item is self._STOP:
+                return
+
+
+class JournalReader(object):
+    """
+        Reads the segments written by `JournalWriter` in `directory`, memory mapping
+        one segment at a time.
+
+        Receive times can step backwards between segments as well as within one, so
+        segments are pruned by the range of times recorded in them rather than by their
+        start times; a segment without a recorded range (e.g. one still being written)
+        is always read.
+    """
+    def __init__(self, directory: str, prefix: str = 'ftx'):
+        self._directory = directory
+        self._prefix = prefix
+
+    def segments(self) -> List[str]:
+        # zero padded, increasing start times, so lexical order is the order written
+        return sorted(glob.glob(os.path.join(self._directory, f'{self._prefix}-*{_SUFFIX}')))
+
+    def frames(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[float, bytes]]:
+        """
+            Yields (receive timestamp, raw frame) for every frame received in [start, end),
+            in the order they were recorded.
+        """
+        for path in self.segments():
+            segment_range = _read_range(path)
+            if segment_range is not None:
+                earliest, latest = segment_range
+                if (end is not None and earliest >= end) or (start is not None and latest < start):
+                    continue
+
+            yield from self._read_segment(path, start, end)
+
+    def _read_segment(self, path: str, start: Optional[float], end: Optional[float]) -> Iterator[Tuple[float, bytes]]:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                offset = 0
+                while offset + _HEADER.size <= len(data):
+                    timestamp, length = _HEADER.unpack_from(data, offset)
+                    offset += _HEADER.size
+
+                    # a frame still being written by the writer thread
+                    if offset + length > len(data):
+                        return
+
+                    # receive times are wall clock times, which can step backwards, so a
+                    # frame past `end` does not mean every later one is: skip it rather
+                    # than stop
+                    if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                        yield timestamp, data[offset:offset + length]
+
+                    offset += length
@@ -0,0 +1,320 @@
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+import time
+import zlib
+
+import numpy
+
+from cryptomancer.exchange_feed.depth_view import DepthView
+
+T = TypeVar('T')
+
+
+class OrderBookSide(object):
+    """
+        One side of an L2 order book, kept sorted best price first.
+
+        Price levels are stored in parallel arrays ordered by a sort key
+        (the price for asks, the negated price for bids), so the best level
+        is always at index 0, a level is located with a binary search and
+        the top k levels are a slice.
+
+        The `price:size` string FTX checksums for each level is cached
+        alongside it and only reformatted once the level has been touched.
+
+        `top_size`, the total size of the best `top_levels` levels, is kept up to
+        date as levels change rather than summed when read.
+    """
+    def __init__(self, descending: bool, top_levels: int = 10):
+        self._sign = -1. if descending else 1.
+        self._keys: List[float] = []
+        self._prices: List[float] = []
+        self._sizes: List[float] = []
+        self._formatted: List[Optional[str]] = []
+        self._top_levels = top_levels
+        self.top_size: float = 0.
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def __contains__(self, price: float) -> bool:
+        key = self._sign * price
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._prices.clear()
+        self._sizes.clear()
+        self._formatted.clear()
+        self.top_size = 0.
+
+    def resum(self) -> None:
+        # recomputes top_size exactly, discarding any rounding accumulated by updates
+        self.top_size = float(sum(self._sizes[:self._top_levels]))
+
+    def update(self, price: float, size: float) -> None:
+        key = self._sign * price
+        i = bisect_left(self._keys, key)
+        n = self._top_levels
+
+        if i < len(self._keys) and self._keys[i] == key:
+            if size:
+                if i < n:
+                    self.top_size += size - self._sizes[i]
+                self._sizes[i] = size
+                self._formatted[i] = None
+            else:
+                if i < n:
+                    # the level below the top moves up into it
+                    self.top_size -= self._sizes[i]
+                    if len(self._sizes) > n:
+                        self.top_size += self._sizes[n]
+                del self._keys[i]
+                del self._prices[i]
+                del self._sizes[i]
+                del self._formatted[i]
+
+        elif size:
+            if i < n:
+                # the last level of the top is pushed out of it
+                self.top_size += size
+                if len(self._sizes) >= n:
+                    self.top_size -= self._sizes[n - 1]
+            self._keys.insert(i, key)
+            self._prices.insert(i, price)
+            self._sizes.insert(i, size)
+            self._formatted.insert(i, None)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._prices:
+            return None
+        return (self._prices[0], self._sizes[0])
+
+    def top(self, depth: Optional[int] = None) -> List[Tuple[float, float]]:
+        return list(zip(self._prices[:depth], self._sizes[:depth]))
+
+    def formatted(self, depth: int) -> List[str]:
+        formatted = self._formatted
+        for i in range(min(depth, len(formatted))):
+            if formatted[i] is None:
+                formatted[i] = f'{float(self._prices[i])}:{float(self._sizes[i])}'
+        return formatted[:depth]
+
+    def arrays(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        return (numpy.array(self._prices, dtype = numpy.float64),
+                numpy.array(self._sizes, dtype = numpy.float64))
+
+
+BookAnalytics = namedtuple('BookAnalytics', [
+    'timestamp',        # exchange time of the update
+    'microprice',       # best bid and ask weighted by the size on the opposite side
+    'imbalance',        # (bid size - ask size) / (bid size + ask size) over the top levels, in [-1, 1]
+    'spread',
+    'spread_ticks',     # None until the market's tick size is known
+    'pressure',         # time-decayed EWMA of imbalance
+])
+
+
+class OrderBook(object):
+    """
+        L2 order book for a single market, maintained from FTX orderbook
+        partial / update messages.
+
+        A single thread writes the book; any number of threads can read it through
+        `snapshot()`, which returns an immutable DepthView of the last published state.
+        Writes are guarded seqlock style: `version` is odd while the book is being
+        changed and even once the change is published, so a reader copies the levels
+        without taking a lock and retries if the version moved underneath it.
+        Snapshots are cached, so readers between two updates share one copy.
+        The best level and the top few levels are read the same way straight off the
+        book, without copying the rest of it.
+
+        Each publish also replaces `analytics`, a BookAnalytics computed from the top of
+        the book and the top `imbalance_levels` levels each side, in constant time.
+        Book pressure decays with a half-life of `pressure_halflife` seconds of exchange time.
+    """
+    def __init__(self, imbalance_levels: int = 10, pressure_halflife: float = 1.,
+                    tick_size: Optional[float] = None):
+        self.bids = OrderBookSide(descending = True, top_levels = imbalance_levels)
+        self.asks = OrderBookSide(descending = False, top_levels = imbalance_levels)
+        self.timestamp: float = 0.0
+
+        self.tick_size = tick_size
+        self._pressure_halflife = pressure_halflife
+        self.analytics: Optional[BookAnalytics] = None
+
+        self.version: int = 0
+        self._snapshot: Optional[DepthView] = None
+
+        # set while the book is the last one seen before a reconnect, until a new partial arrives
+        self.stale: bool = False
+
+        # bookkeeping for sampled checksum verification; `verified` is whether the
+        # checksum of the last update published was checked, passed on to snapshots
+        self.unverified_updates: int = 0
+        self.verified_at: float = 0.0
+        self.verified: bool = True
+
+    def _begin_write(self) -> None:
+        if not self.version % 2:
+            self.version += 1
+
+    def publish(self) -> None:
+        """
+            Makes the changes applied so far visible to readers.
+        """
+        if self.version % 2:
+            self._update_analytics()
+            self.version += 1
+
+    def _update_analytics(self) -> None:
+        best_bid = self.bids.best()
+        best_ask = self.asks.best()
+        if best_bid is None or best_ask is None:
+            self.analytics = None
+            return
+
+        bid, bid_size = best_bid
+        ask, ask_size = best_ask
+        bid_depth, ask_depth = self.bids.top_size, self.asks.top_size
+
+        microprice = (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+        imbalance = (bid_depth - ask_depth) / (bid_depth + ask_depth)
+        spread = ask - bid
+
+        previous = self.analytics
+        if previous is None:
+            pressure = imbalance
+        else:
+            weight = 0.5 ** (max(self.timestamp - previous.timestamp, 0.) / self._pressure_halflife)
+            pressure = weight * previous.pressure + (1. - weight) * imbalance
+
+        self.analytics = BookAnalytics(self.timestamp, microprice, imbalance, spread,
+                                        round(spread / self.tick_size) if self.tick_size else None, pressure)
+
+    def clear(self) -> None:
+        self._begin_write()
+        self.bids.clear()
+        self.asks.clear()
+        self.timestamp = 0.0
+        self.publish()
+
+    def apply(self, data: Dict, publish: bool = True) -> None:
+        """
+            Applies a partial or update.  With `publish` False the change is held back
+            from readers (e.g. until its checksum has been verified) until `publish()`.
+        """
+        self._begin_write()
+
+        if data['action'] == 'partial':
+            self.bids.clear()
+            self.asks.clear()
+            self.stale = False
+
+        for price, size in data['bids']:
+            self.bids.update(price, size)
+
+        for price, size in data['asks']:
+            self.asks.update(price, size)
+
+        if data['action'] == 'partial':
+            self.bids.resum()
+            self.asks.resum()
+
+        self.timestamp = data['time']
+
+        if publish:
+            self.publish()
+
+    def snapshot(self) -> DepthView:
+        while True:
+            version = self.version
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            if version % 2:
+                # a write is in progress; let the writer finish
+                time.sleep(0)
+                continue
+
+            bid_prices, bid_sizes = self.bids.arrays()
+            ask_prices, ask_sizes = self.asks.arrays()
+            timestamp = self.timestamp
+            verified = self.verified
+
+            if self.version != version:
+                continue
+
+            snapshot = DepthView(bid_prices, bid_sizes, ask_prices, ask_sizes, timestamp, version, verified)
+            self._snapshot = snapshot
+            return snapshot
+
+    def _read(self, read: Callable[[], T]) -> T:
+        """
+            Runs `read` against the live book, retrying as `snapshot()` does until no
+            write overlapped it; for reads of a few levels, which need no full copy.
+        """
+        while True:
+            version = self.version
+            if version % 2:
+                time.sleep(0)
+                continue
+
+            try:
+                result = read()
+            except IndexError:
+                # a level was removed underneath the read
+                continue
+
+            if self.version == version:
+                return result
+
+    def get_best_bid_offer(self) -> Dict:
+        best_bid, best_ask, timestamp = self._read(lambda: (self.bids.best(), self.asks.best(), self.timestamp))
+
+        return {
+            'bid': best_bid[0] if best_bid else None,
+            'bidSize': best_bid[1] if best_bid else None,
+            'ask': best_ask[0] if best_ask else None,
+            'askSize': best_ask[1] if best_ask else None,
+            'time': timestamp,
+            'stale': self.stale
+        }
+
+    def get_orderbook(self, depth: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        bids, asks = self._read(lambda: (self.bids.top(depth), self.asks.top(depth)))
+        return {
+            'bids': bids,
+            'asks': asks
+        }
+
+    def get_cumulative_orderbook(self, depth: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        bids, asks = self._read(lambda: (self.bids.top(depth), self.asks.top(depth)))
+        return {
+            'bids': _cumulative(bids),
+            'asks': _cumulative(asks)
+        }
+
+    def checksum(self, depth: int = 100) -> int:
+        # FTX checksums the top `depth` levels, interleaving bid and ask
+        # levels as `bid_price:bid_size:ask_price:ask_size:...`
+        bids = self.bids.formatted(depth)
+        asks = self.asks.formatted(depth)
+
+        n = min(len(bids), len(asks))
+        checksum_data = [None] * (2 * n)
+        checksum_data[0::2] = bids[:n]
+        checksum_data[1::2] = asks[:n]
+        checksum_data.extend(bids[n:])
+        checksum_data.extend(asks[n:])
+
+        return int(zlib.crc32(':'.join(checksum_data).encode()))
+
+
+def _cumulative(levels: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    prices = [price for price, _ in levels]
+    return list(zip(prices, accumulate(size for _, size in levels)))
@@ -0,0 +1,170 @@
+import time
+from threading import Event, Lock, Thread
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from cryptomancer.exchange_feed.ftx_exchange_feed import FtxExchangeFeed
+from cryptomancer.exchange_feed.ftx_wsocket_client import FtxWebsocketClient
+from cryptomancer.exchange_feed.journal import JournalReader
+from cryptomancer.exchange_feed.orderbook import OrderBook
+
+
+Frame = Tuple[float, Union[str, bytes]]
+
+
+class ReplayWebsocketClient(FtxWebsocketClient):
+    """
+        An FtxWebsocketClient that never connects: frames are handed to `_on_message`
+        directly and nothing is ever sent.  Every channel counts as subscribed, so all
+        recorded data is kept, and reading an empty orderbook does not wait for one.
+    """
+    def connect(self):
+        pass
+
+    def send(self, message):
+        pass
+
+    def _is_subscribed(self, channel: str, market: Optional[str] = None) -> bool:
+        return True
+
+    def _get_subscribed_orderbook(self, market: str) -> OrderBook:
+        return self._orderbooks[market]
+
+
+class ReplayExchangeFeed(FtxExchangeFeed):
+    """
+        Plays recorded (receive timestamp, raw frame) pairs through the same message
+        handlers as FtxExchangeFeed, so anything written against an ExchangeFeed can be
+        run offline.
+
+        Frames can be stepped through synchronously (`step`, `run_until`), which is fully
+        deterministic, or played on a background thread (`start`) at `speed` times real
+        time; a `speed` of None plays as fast as the frames can be handled.  `time()` is
+        the receive time of the last frame played and should be used in place of the
+        wall clock by whatever is being replayed.
+
+        Only the feed is replayed: orders placed through an Account are not simulated.
+    """
+    def __init__(self, frames: Iterable[Frame], speed: Optional[float] = 1.,
+                    checksum_interval: int = 1, checksum_period: Optional[float] = None,
+                    decoder: Optional[str] = None):
+        self._client = None
+
+        # a single client stands in for every connection, so no routing of frames is needed
+        super().__init__(checksum_interval = checksum_interval, checksum_period = checksum_period,
+                            decoder = decoder, orderbook_connections = 0)
+
+        self._frames: Iterator[Frame] = iter(frames)
+        self._pending: Optional[Frame] = None
+        self._speed = speed
+        self._now: Optional[float] = None
+        self._lock = Lock()
+
+        self._thread: Optional[Thread] = None
+        self._stop = Event()
+        self._finished = Event()
+
+    @classmethod
+    def from_journal(cls, directory: str, start: Optional[float] = None, end: Optional[float] = None,
+                        prefix: str = 'ftx', **kwargs) -> 'ReplayExchangeFeed':
+        return cls(JournalReader(directory, prefix).frames(start, end), **kwargs)
+
+    def _create_client(self, account_name: Optional[str]) -> FtxWebsocketClient:
+        if self._client is None:
+            self._client = ReplayWebsocketClient(**self._client_kwargs)
+        return self._client
+
+    def _clients(self) -> List[FtxWebsocketClient]:
+        return [self._client]
+
+    def time(self) -> Optional[float]:
+        return self._now
+
+    def set_speed(self, speed: Optional[float]) -> None:
+        self._speed = speed
+
+    def _peek(self) -> Optional[Frame]:
+        if self._pending is None:
+            self._pending = next(self._frames, None)
+            if self._pending is None:
+                self._finished.set()
+        return self._pending
+
+    def _play(self, frame: Frame) -> None:
+        self._pending = None
+        self._now = frame[0]
+        self._client._on_message(None, frame[1])
+
+    def step(self) -> bool:
+        """
+            Plays the next frame; returns False once there are none left.
+        """
+        with self._lock:
+            frame = self._peek()
+            if frame is None:
+                return False
+
+            self._play(frame)
+            return True
+
+    def run_until(self, timestamp: float) -> None:
+        """
+            Plays every frame received before `timestamp`, then advances the clock to it.
+        """
+        with self._lock:
+            while True:
+                frame = self._peek()
+                if frame is None or frame[0] >= timestamp:
+                    break
+                self._play(frame)
+
+            self._now = max(self._now or timestamp, timestamp)
+
+    def start(self) -> None:
+        """
+            Plays the remaining frames on a background thread, like a live feed would.
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
+
+    def is_finished(self) -> bool:
+        return self._finished.is_set()
+
+    def wait_until_finished(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def _run(self) -> None:
+        # pace against the wall clock from (wall_start, replay_start); re-anchored
+        # whenever the speed changes so the replay does not jump
+        anchor = None
+
+        while not self._stop.is_set():
+            with self._lock:
+                frame = self._peek()
+            if frame is None:
+                return
+
+            speed = self._speed
+            if speed is not None:
+                if anchor is None or anchor[2] != speed:
+                    anchor = (time.time(), self._now if self._now is not None else frame[0], speed)
+
+                delay = anchor[0] + (frame[0] - anchor[1]) / speed - time.time()
+                if delay > 0:
+                    # wake up early if asked to stop
+                    if self._stop.wait(delay):
+                        return
+            else:
+                anchor = None
+
+            self.step()
@@ -0,0 +1,97 @@
+import datetime
+from typing import Any, List, Tuple, Union
+
+import numpy
+
+
+TRADE_DTYPE = numpy.dtype([
+    ('time', 'f8'),
+    ('price', 'f8'),
+    ('size', 'f8'),
+    ('side', 'i1'),         # 1 for buy, -1 for sell
+    ('liquidation', '?'),
+])
+
+FILL_DTYPE = numpy.dtype([
+    ('time', 'f8'),
+    ('market', 'U32'),
+    ('order_id', 'i8'),
+    ('price', 'f8'),
+    ('size', 'f8'),
+    ('side', 'i1'),         # 1 for buy, -1 for sell
+    ('fee', 'f8'),
+    ('taker', '?'),
+])
+
+
+def side_to_int(side: str) -> int:
+    return 1 if side == 'buy' else -1
+
+
+def to_timestamp(value: Union[str, float]) -> float:
+    # FTX sends trade and fill times as ISO 8601 strings
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class RingBuffer(object):
+    """
+        Fixed-capacity ring of numpy structured records.
+
+        Every appended record gets a sequence number; `since(cursor)` returns the records
+        appended after `cursor` (as long as they have not been overwritten yet) together
+        with the cursor to pass in next time.
+    """
+    def __init__(self, dtype: numpy.dtype, capacity: int):
+        self._data = numpy.zeros(capacity, dtype = dtype)
+        self._capacity = capacity
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self._capacity)
+
+    def cursor(self) -> int:
+        return self._count
+
+    def append(self, record: tuple) -> None:
+        self._data[self._count % self._capacity] = record
+        self._count += 1
+
+    def _concatenate(self, head, tail):
+        return numpy.concatenate((head, tail))
+
+    def since(self, cursor: int = 0) -> Tuple[numpy.ndarray, int]:
+        count = self._count
+        start = max(cursor, count - self._capacity, 0)
+        n = count - start
+
+        if n <= 0:
+            return self._data[:0].copy(), count
+
+        i = start % self._capacity
+        if i + n <= self._capacity:
+            records = self._data[i:i + n].copy()
+        else:
+            records = self._concatenate(self._data[i:], self._data[:i + n - self._capacity])
+
+        # the writer may have lapped us while copying; drop anything overwritten
+        overwritten = self._count - self._capacity - start
+        if overwritten > 0:
+            records = records[overwritten:]
+
+        return records, count
+
+
+class ObjectRingBuffer(RingBuffer):
+    """
+        RingBuffer of arbitrary Python objects, e.g. the dicts of fills or order updates
+        as received; `since` returns them as a list.
+    """
+    def __init__(self, capacity: int):
+        self._data: List[Any] = [None] * capacity
+        self._capacity = capacity
+        self._count = 0
+
+    def _concatenate(self, head: List[Any], tail: List[Any]) -> List[Any]:
+        return head + tail
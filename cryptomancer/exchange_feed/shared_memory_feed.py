@@ -0,0 +1,298 @@
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy
+
+from cryptomancer.exchange_feed import ExchangeFeed
+from cryptomancer.exchange_feed.depth_view import DepthView
+
+
+_MAGIC = b'cmfeed02'
+
+_HEADER_DTYPE = numpy.dtype([('magic', 'S8'), ('n_markets', 'i8'), ('depth', 'i8')])
+
+_MARKET_DTYPE = numpy.dtype('S32')
+
+# `version` is a seqlock per market, as in OrderBook: odd while the publisher is writing
+_TICKER_DTYPE = numpy.dtype([('version', 'u8'), ('sequence', 'i8'), ('bid', 'f8'), ('ask', 'f8'),
+                                ('bidSize', 'f8'), ('askSize', 'f8'), ('last', 'f8'), ('time', 'f8')])
+_TICKER_FIELDS = _TICKER_DTYPE.names[2:]
+
+
+def _book_dtype(depth: int) -> numpy.dtype:
+    return numpy.dtype([('version', 'u8'), ('sequence', 'i8'), ('time', 'f8'), ('n_bids', 'i8'), ('n_asks', 'i8'),
+                        ('verified', '?'),
+                        ('bid_prices', 'f8', (depth,)), ('bid_sizes', 'f8', (depth,)),
+                        ('ask_prices', 'f8', (depth,)), ('ask_sizes', 'f8', (depth,))])
+
+
+def feed_name(account_name: Optional[str] = None) -> str:
+    """
+        Default name of the shared memory segment published for `account_name`.
+    """
+    return f'cryptomancer_feed_{account_name or "public"}'
+
+
+def _layout(buffer, n_markets: int, depth: int, offset: int = 0) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    # markets, tickers and books, laid out one after the other after the header
+    book_dtype = _book_dtype(depth)
+    markets = numpy.ndarray((n_markets,), _MARKET_DTYPE, buffer, offset)
+    offset += markets.nbytes
+    tickers = numpy.ndarray((n_markets,), _TICKER_DTYPE, buffer, offset)
+    offset += tickers.nbytes
+    books = numpy.ndarray((n_markets,), book_dtype, buffer, offset)
+    return markets, tickers, books
+
+
+def _size(n_markets: int, depth: int) -> int:
+    return (_HEADER_DTYPE.itemsize + n_markets * (_MARKET_DTYPE.itemsize + _TICKER_DTYPE.itemsize)
+            + n_markets * _book_dtype(depth).itemsize)
+
+
+def _attach(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track = False)
+
+    shm = SharedMemory(name)
+    # before 3.13 attaching also registers the segment with this process's resource
+    # tracker, which would unlink it from under the publisher when this process exits
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class SharedMemoryPublisher(object):
+    """
+        Publishes the tickers and top `depth` levels of the order books of `markets`
+        from `exchange_feed` into a named shared memory segment, for any number of
+        `SharedMemoryExchangeFeed`s in other processes to read without opening sockets
+        of their own.
+
+        Updates are written from `exchange_feed` callbacks as they are applied, under a
+        seqlock per market and channel, so the publisher never waits on a reader.
+
+        The segment belongs to the publisher: it is removed by `close`, which should be
+        called once readers are done (or use the publisher as a context manager).
+    """
+    def __init__(self, exchange_feed: ExchangeFeed, markets: Iterable[str], name: Optional[str] = None, depth: int = 20):
+        self._exchange_feed = exchange_feed
+        self._markets = list(markets)
+        self._index = {market: i for i, market in enumerate(self._markets)}
+        self._depth = depth
+        self.name = name if name is not None else feed_name()
+
+        n_markets = len(self._markets)
+        try:
+            self._shm = SharedMemory(self.name, create = True, size = _size(n_markets, depth))
+        except FileExistsError:
+            raise Exception(f"Shared memory segment '{self.name}' already exists: either another publisher "
+                            f"is running or one exited without closing it (remove /dev/shm/{self.name}).")
+        # attaching processes may share this process's resource tracker (e.g. forked
+        # pool workers), so the segment's lifetime is left to `close` rather than to it
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+
+        self._header = numpy.ndarray((1,), _HEADER_DTYPE, self._shm.buf)
+        self._market_names, self._tickers, self._books = _layout(self._shm.buf, n_markets, depth, _HEADER_DTYPE.itemsize)
+
+        # a new segment is zero-filled: no market has a ticker or book yet
+        self._market_names[:] = [market.encode() for market in self._markets]
+        self._header[0] = (_MAGIC, n_markets, depth)
+
+        self._callbacks = []
+        for market in self._markets:
+            self._callbacks.append(exchange_feed.on_ticker(market, self._publish_ticker))
+            self._callbacks.append(exchange_feed.on_book(market, self._publish_book))
+
+    def _publish_ticker(self, market: str, ticker: Dict) -> None:
+        i = self._index[market]
+        tickers = self._tickers
+
+        version = int(tickers['version'][i]) + 1
+        tickers['version'][i] = version
+        # FTX sends null for a missing price or size, stored as NaN
+        tickers[i] = (version, tickers['sequence'][i] + 1) + tuple(
+                        numpy.nan if ticker[field] is None else ticker[field] for field in _TICKER_FIELDS)
+        tickers['version'][i] = version + 1
+
+    def _publish_book(self, market: str, depth: DepthView) -> None:
+        i = self._index[market]
+        books = self._books
+        n_bids = min(len(depth.bids), self._depth)
+        n_asks = min(len(depth.asks), self._depth)
+
+        version = int(books['version'][i]) + 1
+        books['version'][i] = version
+        books['sequence'][i] += 1
+        books['time'][i] = depth.timestamp
+        books['n_bids'][i] = n_bids
+        books['n_asks'][i] = n_asks
+        books['verified'][i] = depth.verified
+        books['bid_prices'][i, :n_bids] = depth.bids.prices[:n_bids]
+        books['bid_sizes'][i, :n_bids] = depth.bids.sizes[:n_bids]
+        books['ask_prices'][i, :n_asks] = depth.asks.prices[:n_asks]
+        books['ask_sizes'][i, :n_asks] = depth.asks.sizes[:n_asks]
+        books['version'][i] = version + 1
+
+    def close(self) -> None:
+        for callback in self._callbacks:
+            self._exchange_feed.remove_callback(callback)
+        self._callbacks = []
+
+        if self._shm is None:
+            return
+
+        del self._header, self._market_names, self._tickers, self._books
+        self._shm.close()
+        # balance the unregister in __init__, which `unlink` undoes
+        resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> 'SharedMemoryPublisher':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class SharedMemoryExchangeFeed(ExchangeFeed):
+    """
+        Exchange feed reading the tickers and order books a `SharedMemoryPublisher`
+        publishes under `name`, with no connection of its own.
+
+        Only the published markets are available, and only the ticker and orderbook
+        channels; order and fill methods raise NotImplementedError, as on the base feed,
+        so orders fall back to polling the exchange.  With no way to be signalled across
+        processes, `wait_for_update` polls: every `poll_interval` seconds at first, backing
+        off exponentially up to `max_poll_interval` while nothing changes, so idle readers
+        stay cheap while busy ones see updates quickly.
+    """
+    def __init__(self, name: Optional[str] = None, poll_interval: float = 0.001, max_poll_interval: float = 0.05):
+        super().__init__()
+        self.name = name if name is not None else feed_name()
+        self._poll_interval = poll_interval
+        self._max_poll_interval = max_poll_interval
+
+        self._shm = _attach(self.name)
+        header = numpy.ndarray((1,), _HEADER_DTYPE, self._shm.buf)[0]
+        if header['magic'] != _MAGIC:
+            raise Exception(f"Shared memory segment '{self.name}' is not a published exchange feed.")
+
+        n_markets = int(header['n_markets'])
+        self._depth = int(header['depth'])
+        market_names, self._tickers, self._books = _layout(self._shm.buf, n_markets, self._depth, _HEADER_DTYPE.itemsize)
+        self._index = {market.decode(): i for i, market in enumerate(market_names.tolist())}
+
+    def _get_index(self, market: str) -> int:
+        try:
+            return self._index[market]
+        except KeyError:
+            raise KeyError(f"Market '{market}' is not published on '{self.name}'.") from None
+
+    def _read(self, records: numpy.ndarray, market: str) -> numpy.void:
+        i = self._get_index(market)
+        versions = records['version']
+
+        while True:
+            version = int(versions[i])
+            if version % 2:
+                # a write is in progress; let the writer finish
+                time.sleep(0)
+                continue
+
+            record = records[i].copy()
+            if int(versions[i]) == version:
+                return record
+
+    def subscribe_many(self, markets: Iterable[str], channels: Iterable[str]) -> None:
+        for channel in channels:
+            if channel not in {'ticker', 'orderbook'}:
+                raise NotImplementedError
+        for market in markets:
+            self._get_index(market)
+
+    def get_ticker(self, market: str) -> Dict:
+        ticker = self._read(self._tickers, market)
+        if ticker['sequence'] == 0:
+            return {}
+
+        data = {field: None if numpy.isnan(ticker[field]) else float(ticker[field]) for field in _TICKER_FIELDS}
+        data['sequence'] = int(ticker['sequence'])
+        return data
+
+    def _records(self, channel: str) -> numpy.ndarray:
+        if channel == 'ticker':
+            return self._tickers
+        elif channel == 'orderbook':
+            return self._books
+        raise NotImplementedError
+
+    def get_sequence(self, market: str, channel: str = 'ticker') -> int:
+        return int(self._records(channel)['sequence'][self._get_index(market)])
+
+    def wait_for_update(self, market: str, channel: str = 'ticker', after_seq: Optional[int] = None,
+                            timeout: Optional[float] = None) -> int:
+        sequences = self._records(channel)['sequence']
+        i = self._get_index(market)
+
+        if after_seq is None:
+            after_seq = int(sequences[i])
+
+        deadline = time.time() + timeout if timeout is not None else None
+        poll_interval = self._poll_interval
+        while sequences[i] <= after_seq:
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                time.sleep(min(poll_interval, remaining))
+            else:
+                time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, self._max_poll_interval)
+
+        return int(sequences[i])
+
+    def get_depth(self, market: str) -> DepthView:
+        book = self._read(self._books, market)
+        n_bids, n_asks = int(book['n_bids']), int(book['n_asks'])
+        return DepthView(book['bid_prices'][:n_bids], book['bid_sizes'][:n_bids],
+                            book['ask_prices'][:n_asks], book['ask_sizes'][:n_asks],
+                            float(book['time']), int(book['sequence']), bool(book['verified']))
+
+    def get_live_depth(self, market: str) -> Optional[DepthView]:
+        if market not in self._index or self.get_sequence(market, 'orderbook') == 0:
+            return None
+        return self.get_depth(market)
+
+    def get_bid_offer(self, market: str) -> Dict:
+        depth = self.get_depth(market)
+        best_bid = depth.bids.best_level()
+        best_ask = depth.asks.best_level()
+
+        return {
+            'bid': best_bid[0] if best_bid else None,
+            'bidSize': best_bid[1] if best_bid else None,
+            'ask': best_ask[0] if best_ask else None,
+            'askSize': best_ask[1] if best_ask else None,
+            'time': depth.timestamp,
+        }
+
+    def get_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
+        depth = self.get_depth(market)
+        return {
+            'bids': list(zip(depth.bids.prices.tolist(), depth.bids.sizes.tolist())),
+            'asks': list(zip(depth.asks.prices.tolist(), depth.asks.sizes.tolist()))
+        }
+
+    def get_cumulative_orderbook(self, market: str) -> Dict[str, List[Tuple[float, float]]]:
+        depth = self.get_depth(market)
+        return {
+            'bids': list(zip(depth.bids.prices.tolist(), depth.bids.cumulative_sizes.tolist())),
+            'asks': list(zip(depth.asks.prices.tolist(), depth.asks.cumulative_sizes.tolist()))
+        }
+
+    def close(self) -> None:
+        del self._tickers, self._books
+        self._shm.close()
@@ -11,6 +11,8 @@ class WebsocketManager:
     def __init__(self):
         self.connect_lock = Lock()
         self.ws = None
+        self._reconnect_count = 0
+        self._disconnected_at = None
 
     def _get_url(self):
         raise NotImplementedError()
@@ -18,6 +20,11 @@ class WebsocketManager:
     def _on_message(self, ws, message):
         raise NotImplementedError()
 
+    def _on_open(self, ws):
+        # called on every (re)connect, before anything else is sent on the
+        # new connection; anything not sent on the old one is lost
+        pass
+
     def send(self, message):
         self.connect()
         self.ws.send(message)
@@ -30,6 +37,7 @@ class WebsocketManager:
 
         self.ws = WebSocketApp(
             self._get_url(),
+            on_open = self._wrap_callback(self._on_open),
             on_message = self._wrap_callback(self._on_message),
             on_close = self._wrap_callback(self._on_close),
             on_error = self._wrap_callback(self._on_error),
@@ -67,6 +75,8 @@ class WebsocketManager:
     def _reconnect(self, ws):
         assert ws is not None, '_reconnect should only be called with an existing ws'
         if ws is self.ws:
+            self._reconnect_count += 1
+            self._disconnected_at = time.time()
             self.ws = None
             ws.close()
             self.connect()
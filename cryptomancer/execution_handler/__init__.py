@@ -5,11 +5,12 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from cryptomancer.account import Account
     from cryptomancer.exchange_feed import ExchangeFeed
+    from cryptomancer.exchange_feed.depth_view import DepthView
 
 from cryptomancer.execution_handler.execution_session import ExecutionSession
 from cryptomancer.execution_handler.order_status import OrderStatus
 
-from typing import Optional
+from typing import Optional, Tuple
 
 from functools import wraps
 
@@ -29,6 +30,21 @@ def session_required(fn):
 
 
 class Order:
+    # how often a feed-driven wait double checks the order status with the exchange
+    _RECONCILE_INTERVAL_S = 1.0
+
+    # how long to wait between polls of the exchange without an exchange feed; the
+    # same pace a session polls its orders at
+    _POLL_INTERVAL_S = ExecutionSession._POLL_INTERVAL_S
+
+    # whether the order's status can be read from the account's open orders, or from
+    # the exchange feed's orders, in a batch with other orders
+    _BATCHED_STATUS = True
+
+    # how old a cached open order status `get_status` may return by default; a closed
+    # status is final, so it is kept until the order id changes (e.g. on rollback)
+    _STATUS_MAX_AGE_S = 0.
+
     def __init__(self, type: str, account: 'Account', exchange_feed: 'ExchangeFeed'):
         self._type = type
         self._account = account
@@ -37,12 +53,21 @@ class Order:
         self._id = None
         self._exception = None
 
+        self._status = None
+        self._status_time = None
+        self._status_marker = None
+        self.status_hits = 0
+        self.status_fetches = 0
+
     def get_account(self):
         return self._account
 
     def get_exchange_feed(self):
         return self._exchange_feed
 
+    def get_market(self):
+        return self._market
+
     def set_session(self, session: ExecutionSession):
         self._session = session
 
@@ -51,6 +76,7 @@ class Order:
 
     def set_id(self, order_id):
         self._id = order_id 
+        self._status = None
 
     def failed(self):
         return self._id == -1
@@ -63,6 +89,7 @@ class Order:
             return
 
         account = self.get_account()
+        self._status = None
         return account.cancel_order(self.get_id())
 
     def is_pending(self) -> bool:
@@ -82,9 +109,22 @@ class Order:
         return (order_status.status != 'open')
 
     def wait_until_closed(self, timeout: Optional[float] = None):
+        """
+            Blocks until the order is closed.
+
+            With an exchange feed, this waits on order updates pushed over the feed and only
+            asks the exchange for the order status every `_RECONCILE_INTERVAL_S` seconds, in
+            case an update was missed (e.g. the order closed before the feed subscribed).
+            Without one, or with one that carries no order updates, the exchange is polled
+            every `_POLL_INTERVAL_S` seconds.
+        """
         if timeout:
             status = self.get_status()
             start_time = status.created_time
+
+        exchange_feed = self.get_exchange_feed()
+        if exchange_feed is not None and not exchange_feed.has_order_updates():
+            exchange_feed = None
         
         while True:
             if self.is_closed():
@@ -96,18 +136,64 @@ class Order:
                 if elapsed > timeout:
                     raise TimeoutError("Order timed out.")
 
-            # TODO: Since we're not doing async status
-            # make sure we sleep to pass to other threads
-            # in this infinite loop.
-            time.sleep(0)
+            if exchange_feed is not None:
+                try:
+                    order = exchange_feed.wait_for_order(self.get_id(), 
+                                                            lambda order: order['status'] == 'closed', 
+                                                            self._RECONCILE_INTERVAL_S)
+                    if order is not None and order['status'] == 'closed':
+                        break
+                    continue
+
+                except NotImplementedError:
+                    exchange_feed = None
+
+            time.sleep(self._POLL_INTERVAL_S)
+
+    def _wait_for_ticker(self, market: str, timeout: float = 1.) -> None:
+        """
+            Blocks until the exchange feed has a ticker for `market`, for at most `timeout` seconds.
+        """
+        try:
+            self.get_exchange_feed().wait_for_update(market, 'ticker', after_seq = 0, timeout = timeout)
+        except NotImplementedError:
+            time.sleep(timeout)
+
+    def _get_depth(self, market: str) -> Optional['DepthView']:
+        """
+            Returns the exchange feed's order book depth for `market` if the book is already
+            being received, or None; it never subscribes, so submitting is not held up by it.
+        """
+        try:
+            return self.get_exchange_feed().get_live_depth(market)
+        except NotImplementedError:
+            return None
 
     def _get_parameters(self) -> dict:
         raise NotImplementedError
         
-    def get_status(self) -> dict:
+    def get_status(self, max_age: Optional[float] = None) -> OrderStatus:
+        """
+            Returns the order's status, from the last one fetched if that is at most
+            `max_age` seconds old (`_STATUS_MAX_AGE_S` if None) and the exchange feed has
+            had no order update or fill for the order since.
+
+            `_STATUS_MAX_AGE_S` is 0, so unless a caller passes `max_age` an open order's
+            status is always fetched; only a closed status, which is final, is reused.
+        """
         if not self.get_id():
             raise Exception("Cannot poll non-executed order.")
-        
+
+        if self._is_status_fresh(max_age):
+            self.status_hits += 1
+            return self._status
+
+        # taken before fetching, so an update arriving meanwhile invalidates the result
+        marker = self._get_status_marker()
+        self.status_fetches += 1
+        return self._set_status(self._fetch_status(), marker)
+
+    def _fetch_status(self) -> OrderStatus:
         if self.failed():
             status = OrderStatus(order_id = -1,
                             created_time = None,
@@ -124,12 +210,72 @@ class Order:
 
         else:
             account = self.get_account()
-            status = account.get_order_status(self.get_id())
-            status.parameters = self._get_parameters()
-            status.exception = self._exception
+            status = self._complete_status(account.get_order_status(self.get_id()))
 
         return status
 
+    def _complete_status(self, status: OrderStatus) -> OrderStatus:
+        status.parameters = self._get_parameters()
+        status.exception = self._exception
+        return status
+
+    def _set_status(self, status: OrderStatus, marker: Optional[Tuple] = None) -> OrderStatus:
+        self._status = status
+        self._status_time = time.time()
+        self._status_marker = marker
+        return status
+
+    def _is_status_fresh(self, max_age: Optional[float] = None) -> bool:
+        if self._status is None:
+            return False
+
+        if self._status.status == 'closed':
+            return True
+
+        if max_age is None:
+            max_age = self._STATUS_MAX_AGE_S
+
+        if time.time() - self._status_time > max_age:
+            return False
+
+        return not self._status_changed()
+
+    def _get_status_marker(self) -> Optional[Tuple[int, int]]:
+        """
+            The exchange feed's order update and fill cursors, to tell later whether it has
+            had an update or fill for the order since; None (so the status is only cached
+            for its max age) unless the feed is already receiving both, as reading the
+            cache must not log in or subscribe.
+        """
+        exchange_feed = self.get_exchange_feed()
+        if exchange_feed is None:
+            return None
+
+        try:
+            orders_cursor = exchange_feed.get_orders_cursor()
+            fills_cursor = exchange_feed.get_fills_cursor()
+        except NotImplementedError:
+            return None
+
+        if orders_cursor is None or fills_cursor is None:
+            return None
+        return (orders_cursor, fills_cursor)
+
+    def _status_changed(self) -> bool:
+        if self._status_marker is None:
+            return False
+
+        orders_cursor, fills_cursor = self._status_marker
+        exchange_feed = self.get_exchange_feed()
+        orders, orders_cursor = exchange_feed.get_orders_changed_since(orders_cursor)
+        fills, fills_cursor = exchange_feed.get_fills_array(fills_cursor)
+        if self.get_id() in orders or (fills['order_id'] == self.get_id()).any():
+            return True
+
+        # none of these updates were the order's; skip past them next time
+        self._status_marker = (orders_cursor, fills_cursor)
+        return False
+
     def submit(self):
         raise NotImplementedError
 
@@ -34,22 +34,33 @@ class AutoLimitOrder(Order):
                 underlying_market = self._exchange_feed.get_ticker(self._market)
 
                 if self._side == 'buy':
-                    self._price = underlying_market['ask'] * (1. + self._width)
+                    target_underlying_px = underlying_market['ask']
                 else:
-                    self._price = underlying_market['bid'] * (1. - self._width)
-                
+                    target_underlying_px = underlying_market['bid']
+
+                # set the limit `width` through the deepest level needed to fill our size, rather
+                # than through the touch; fall back to the touch if there is no book or it is too thin
+                depth = self._get_depth(self._market)
+                impact_price = depth.impact_price(self._side, self._size) if depth is not None else None
+                if impact_price is None:
+                    impact_price = target_underlying_px
+
+                if self._side == 'buy':
+                    self._price = impact_price * (1. + self._width)
+                else:
+                    self._price = impact_price * (1. - self._width)
+
                 break
 
             except:
-                # weird issue where the first time we subscribe to a websocket we can sometimes get
-                # a {} response; so probably just retry...
-                time.sleep(1)
+                # the first time we subscribe to a websocket the ticker is an empty {}
+                # until the first update arrives; wait for it and retry
+                self._wait_for_ticker(self._market)
                 continue
         else:
             # we failed all attempts (didn't break from loop)
             raise Exception("Exchange feed issue")
 
-
         try:
             status = account.place_order(market = self._market, side = self._side, price = self._price, 
                                     size = self._size, type = "limit", **self._kwargs)
@@ -1,14 +1,42 @@
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+from threading import Lock
 import time
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 from functools import wraps
 
+import datetime
+import pytz
+
+from cryptomancer.execution_handler.order_status import OrderStatus, from_exchange_order
+
+
+# shared by all concurrent sessions and started once, so submitting a leg never
+# waits on a thread being created
+_SUBMIT_POOL_WORKERS = 16
+_submit_pool = None
+_submit_pool_lock = Lock()
+
+def _get_submit_pool() -> ThreadPoolExecutor:
+    global _submit_pool
+    with _submit_pool_lock:
+        if _submit_pool is None:
+            _submit_pool = ThreadPoolExecutor(max_workers = _SUBMIT_POOL_WORKERS, thread_name_prefix = 'order-submit')
+        return _submit_pool
+
+
 @contextmanager
-def execution_scope(wait: bool = True, timeout: Optional[int] = None, rollback: Optional[bool] = False):
-    """Provide a transactional scope around a series of operations."""
-    session = ExecutionSession(timeout)
+def execution_scope(wait: bool = True, timeout: Optional[int] = None, rollback: Optional[bool] = False,
+                        concurrent: bool = False):
+    """
+        Provide a transactional scope around a series of operations.
+
+        With `concurrent`, every order in the session is sent at once instead of one
+        after the other, so the legs are not a REST round trip apart.
+    """
+    session = ExecutionSession(timeout, concurrent)
     try:
         yield session
     except:
@@ -51,21 +79,109 @@ def not_closed(fn):
     return wrapper
 
 class ExecutionSession(object):
-    def __init__(self, timeout: Optional[int] = None):
+    # how long to wait between polls of the statuses of orders without an exchange
+    # feed, so that waiting on a session does not run into the exchange's rate limits
+    _POLL_INTERVAL_S = 0.25
+
+    def __init__(self, timeout: Optional[int] = None, concurrent: bool = False):
         self._timeout = timeout
+        self._concurrent = concurrent
         self._orders = []
+        self._leg_timings = {}
         self._final_status = None
         self._closed = False
 
     def get_orders(self):
         return self._orders
 
-    def get_order_statuses(self):
+    def get_leg_timings(self) -> List[Dict]:
+        """
+            When each submitted order was sent and acknowledged by the exchange (epoch
+            seconds), in the order the orders were added.
+        """
+        return [dict(order_id = order.get_id(), **self._leg_timings[i])
+                    for i, order in enumerate(self._orders) if i in self._leg_timings]
+
+    def get_leg_skew(self) -> Optional[float]:
+        """
+            Seconds between the first and last order acknowledgements, or None until
+            any order has been submitted.
+        """
+        acks = [timing['acked'] for timing in self._leg_timings.values() if timing['acked'] is not None]
+        if not acks:
+            return None
+        return max(acks) - min(acks)
+
+    def get_order_statuses(self, max_age: Optional[float] = None):
         #if not self._closed:
         #    return [order.get_status() for order in self._orders]
         #else:
         #    return self._final_statuses
-        return [order.get_status() for order in self._orders]
+        return self._get_statuses(self._orders, max_age)
+
+    def get_status_counts(self) -> Dict[str, int]:
+        """
+            How many order statuses were served from the orders' caches, and how many
+            were fetched.
+        """
+        return {'hits': sum(order.status_hits for order in self._orders),
+                'fetches': sum(order.status_fetches for order in self._orders)}
+
+    def _get_statuses(self, orders, max_age: Optional[float] = None) -> List[OrderStatus]:
+        """
+            Statuses of `orders`, fetched in as few requests as possible: an order whose
+            cached status is at most `max_age` seconds old uses it, an order the exchange
+            feed has seen close is read from the feed, open orders sharing an account and
+            market are read from one `get_open_orders` call, and only the rest (including
+            orders no longer open) are looked up one by one.
+        """
+        statuses = {}
+        batches = {}
+
+        for i, order in enumerate(orders):
+            if not order._BATCHED_STATUS or not order.get_id() or order.failed():
+                continue
+
+            if order._is_status_fresh(max_age):
+                order.status_hits += 1
+                statuses[i] = order._status
+                continue
+
+            feed_order = self._get_feed_order(order)
+            if feed_order is not None and feed_order['status'] == 'closed':
+                order.status_fetches += 1
+                statuses[i] = order._set_status(order._complete_status(from_exchange_order(feed_order)))
+            else:
+                batches.setdefault((order.get_account(), order.get_market()), []).append(i)
+
+        for (account, market), indices in batches.items():
+            # a single order is as cheap to look up on its own, and then works closed or not
+            if len(indices) < 2:
+                continue
+
+            markers = {i: orders[i]._get_status_marker() for i in indices}
+            try:
+                open_orders = {status.order_id: status for status in account.get_open_orders(market)}
+            except NotImplementedError:
+                continue
+
+            for i in indices:
+                status = open_orders.get(orders[i].get_id())
+                if status is not None:
+                    orders[i].status_fetches += 1
+                    statuses[i] = orders[i]._set_status(orders[i]._complete_status(status), markers[i])
+
+        return [statuses[i] if i in statuses else order.get_status(max_age) for i, order in enumerate(orders)]
+
+    def _get_feed_order(self, order) -> Optional[Dict]:
+        exchange_feed = order.get_exchange_feed()
+        if exchange_feed is None:
+            return None
+
+        try:
+            return exchange_feed.get_order(order.get_id())
+        except NotImplementedError:
+            return None
 
     @not_closed
     def add(self, order):
@@ -111,10 +227,27 @@ class ExecutionSession(object):
         for order in cancelled_orders:
             order.wait_until_closed()
 
+    def _submit_leg(self, i: int, order) -> None:
+        timing = {'sent': time.time(), 'acked': None}
+        self._leg_timings[i] = timing
+        order.submit()
+        timing['acked'] = time.time()
+
     @not_closed
     def _submit(self):
-        for order in self._orders:
-            order.submit()
+        if not self._concurrent or len(self._orders) < 2:
+            for i, order in enumerate(self._orders):
+                self._submit_leg(i, order)
+            return
+
+        pool = _get_submit_pool()
+        futures = [pool.submit(self._submit_leg, i, order) for i, order in enumerate(self._orders)]
+
+        # every leg has been sent by now, so let them all finish before raising, so that
+        # the scope cancels or rolls back each order that made it to the exchange
+        wait_for_futures(futures)
+        for future in futures:
+            future.result()
 
     @not_closed
     def _wait(self, timeout: Optional[float] = None):
@@ -126,5 +259,34 @@ class ExecutionSession(object):
         # same time, as the underlying code uses the created_date
         # of the order to measure whether the timeout
         # period has been exceeeded
+        # orders whose exchange feed carries order updates wait on them instead of
+        # polling; every other order, including one with a market data only feed,
+        # is polled together with the rest
+        def has_order_updates(order):
+            exchange_feed = order.get_exchange_feed()
+            return exchange_feed is not None and exchange_feed.has_order_updates()
+
+        polled = [order for order in self._orders if not has_order_updates(order)]
+        self._poll_until_closed(polled, timeout)
+
         for order in self._orders:
-            order.wait_until_closed(timeout)
+            if has_order_updates(order):
+                order.wait_until_closed(timeout)
+
+    def _poll_until_closed(self, orders, timeout: Optional[float] = None):
+        """
+            Polls the statuses of `orders` together until every one is closed, as
+            `Order.wait_until_closed` does for one order without an exchange feed.
+        """
+        while orders:
+            statuses = self._get_statuses(orders)
+            orders = [order for order, status in zip(orders, statuses) if status.status == 'open']
+
+            if timeout:
+                now = pytz.utc.localize(datetime.datetime.utcnow())
+                for status in statuses:
+                    if status.status == 'open' and (now - status.created_time).seconds > timeout:
+                        raise TimeoutError("Order timed out.")
+
+            if orders:
+                time.sleep(self._POLL_INTERVAL_S)
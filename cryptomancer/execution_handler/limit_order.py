@@ -5,11 +5,12 @@ import datetime
 from cryptomancer.execution_handler import Order, session_required
 from cryptomancer.execution_handler.order_status import OrderStatus
 from cryptomancer.account import Account
+from cryptomancer.exchange_feed import ExchangeFeed
 
 class LimitOrder(Order):
     def __init__(self, account: Account, market: str, side: str, 
-                    size: float, price: float, **kwargs):
-        super().__init__('limit', account, None)
+                    size: float, price: float, exchange_feed: Optional[ExchangeFeed] = None, **kwargs):
+        super().__init__('limit', account, exchange_feed)
         self._market = market
         self._side = side
         self._size = size
@@ -5,12 +5,13 @@ import datetime
 from cryptomancer.execution_handler import Order, session_required
 from cryptomancer.execution_handler.order_status import OrderStatus
 from cryptomancer.account import Account
+from cryptomancer.exchange_feed import ExchangeFeed
 
 
 class LimitOrderDollars(Order):
     def __init__(self, account: Account, market: str, side: str,
-                    size_usd: float, price: float, **kwargs):
-        super().__init__('limit_dollars', account, None)
+                    size_usd: float, price: float, exchange_feed: Optional[ExchangeFeed] = None, **kwargs):
+        super().__init__('limit_dollars', account, exchange_feed)
         self._market = market
         self._side = side
         self._size_usd = size_usd
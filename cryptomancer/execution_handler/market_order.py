@@ -5,11 +5,13 @@ import datetime
 from cryptomancer.execution_handler import Order, session_required
 from cryptomancer.execution_handler.order_status import OrderStatus
 from cryptomancer.account import Account
+from cryptomancer.exchange_feed import ExchangeFeed
 
 
 class MarketOrder(Order):
-    def __init__(self, account: Account, market: str, side: str, size: float, **kwargs):
-        super().__init__('market', account, None)
+    def __init__(self, account: Account, market: str, side: str, size: float, 
+                    exchange_feed: Optional[ExchangeFeed] = None, **kwargs):
+        super().__init__('market', account, exchange_feed)
         self._market = market
         self._side = side
         self._size = size
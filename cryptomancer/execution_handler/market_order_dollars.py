@@ -35,20 +35,25 @@ class MarketOrderDollars(Order):
                     target_underlying_px = underlying_market['ask']
                 else:
                     target_underlying_px = underlying_market['bid']
-                
+
+                # size against the average price the book says we will fill at, rather than the
+                # touch; fall back to the touch if there is no book or it is too thin
+                depth = self._get_depth(self._market)
+                vwap = depth.vwap_for_notional(self._side, self._size_usd) if depth is not None else None
+
+                self._size = self._size_usd / (vwap if vwap is not None else target_underlying_px)
+
                 break
 
             except:
-                # weird issue where the first time we subscribe to a websocket we can sometimes get
-                # a {} response; so probably just retry...
-                time.sleep(1)
+                # the first time we subscribe to a websocket the ticker is an empty {}
+                # until the first update arrives; wait for it and retry
+                self._wait_for_ticker(self._market)
                 continue
         else:
             # we failed all attempts (didn't break from loop)
             raise Exception("Exchange feed issue")
 
-        self._size = self._size_usd / target_underlying_px
-
         try:
             status = account.place_order(market = self._market, side = self._side, price = None, 
                                     size = self._size, type = "market", **self._kwargs)
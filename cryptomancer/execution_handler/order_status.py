@@ -4,6 +4,8 @@ import datetime
 
 from typing import Optional
 
+import pandas
+
 @dataclass
 class OrderStatus:
      order_id: int
@@ -16,4 +18,28 @@ class OrderStatus:
      filled_size: float
      average_fill_price: float
      parameters: Optional[dict] = None,
-     exception: Optional[str] = None
\ No newline at end of file
+     exception: Optional[str] = None
+
+
+# OrderStatus fields and the keys the exchange reports them under
+_EXCHANGE_KEYS = {
+    'order_id': 'id',
+    'market': 'market',
+    'type': 'type',
+    'side': 'side',
+    'size': 'size',
+    'filled_size': 'filledSize',
+    'average_fill_price': 'avgFillPrice',
+    'status': 'status',
+}
+
+
+def from_exchange_order(order: dict, **overrides) -> OrderStatus:
+    """
+        The status of an order as the exchange reports it, over REST or the exchange feed;
+        `overrides` replace fields the exchange does not report (reliably) in `order`.
+    """
+    fields = {field: order[key] for field, key in _EXCHANGE_KEYS.items() if field not in overrides}
+    fields['created_time'] = pandas.Timestamp(order['createdAt']).to_pydatetime()
+    fields.update(overrides)
+    return OrderStatus(**fields)
@@ -8,6 +8,9 @@ from cryptomancer.account import Account
 from cryptomancer.exchange_feed import ExchangeFeed
 
 class TrailingStopOrder(Order):
+    # conditional orders are not among the account's open orders
+    _BATCHED_STATUS = False
+
     def __init__(self, account: Account, market: str, side: str, size: float, 
                     trail_value: int, **kwargs):
         super().__init__('trailing_stop', account, None)
@@ -92,10 +95,7 @@ class TrailingStopOrder(Order):
             self.wait_until_closed()
 
 
-    def get_status(self) -> dict:
-        if not self.get_id():
-            raise Exception("Cannot poll non-executed order.")
-        
+    def _fetch_status(self) -> OrderStatus:
         if self.failed():
             status = OrderStatus(order_id = -1,
                             created_time = None,
@@ -0,0 +1,116 @@
+##########################
+#
+# Benchmarks FtxWebsocketClient against a local stand-in FTX websocket server
+#   - sustained throughput (messages / sec handled)
+#   - handler latency percentiles (time spent in _on_message)
+#   - end-to-end latency percentiles (server timestamp to handled), sampled
+#   - checksum failures (orderbooks reset and resubscribed), reconnects and error frames
+#
+# Run with --rate 0 to find the maximum rate the client can sustain.
+##########################
+
+import sys
+from optparse import OptionParser
+
+from typing import List
+import json
+import time
+
+import numpy
+
+from cryptomancer.exchange_feed.ftx_wsocket_client import FtxWebsocketClient
+from cryptomancer.exchange_feed.ftx_async_wsocket_client import AsyncFtxWebsocketClient
+from cryptomancer.exchange_feed.ftx_local_server import FtxLocalServer
+
+
+def instrumented(client_class):
+    class InstrumentedClient(client_class):
+        def __init__(self, *args, e2e_sample: int = 100, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.handler_latencies: List[float] = []
+            self.e2e_latencies: List[float] = []
+            self.errors = 0
+            self._e2e_sample = e2e_sample
+
+        def _on_message(self, ws, raw_message):
+            received_at = time.time()
+            start = time.perf_counter()
+            try:
+                super()._on_message(ws, raw_message)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.handler_latencies.append(time.perf_counter() - start)
+
+            if len(self.handler_latencies) % self._e2e_sample == 0:
+                data = json.loads(raw_message).get('data')
+                if isinstance(data, dict) and 'time' in data:
+                    self.e2e_latencies.append(received_at - data['time'])
+
+    return InstrumentedClient
+
+
+def report(label: str, latencies: List[float]) -> None:
+    if not latencies:
+        print(f'{label:<25} n/a')
+        return
+
+    p50, p90, p99, p999 = numpy.percentile(numpy.array(latencies) * 1e6, [50, 90, 99, 99.9])
+    print(f'{label:<25} p50 {p50:>9,.1f}us  p90 {p90:>9,.1f}us  p99 {p99:>9,.1f}us  p99.9 {p999:>9,.1f}us')
+
+
+if __name__ == '__main__':
+    usage = "usage: " + sys.argv[0] + " [optional-args]"
+    parser = OptionParser(usage = usage)
+
+    parser.add_option("-m", "--markets",
+                      help="Comma separated synthetic markets", type=str, dest="markets", default = "BTC-PERP,ETH-PERP,SOL-PERP")
+    parser.add_option("-r", "--rate",
+                      help="Messages / sec sent per connection (0 for unlimited)", type=float, dest="rate", default = 5000)
+    parser.add_option("-d", "--duration",
+                      help="Seconds to run for", type=float, dest="duration", default = 10)
+    parser.add_option("-a", "--asyncio",
+                      help="Use the asyncio client", action="store_true", dest="use_asyncio", default = False)
+    parser.add_option("-i", "--checksum-interval",
+                      help="Verify every Nth orderbook checksum", type=int, dest="checksum_interval", default = 1)
+    parser.add_option("--decoder",
+                      help="JSON decoder (orjson / json)", type=str, dest="decoder", default = None)
+    parser.add_option("--reconnect-every",
+                      help="Server asks the client to reconnect every N messages", type=int, dest="reconnect_every", default = None)
+    parser.add_option("--error-every",
+                      help="Server sends an error frame every N messages", type=int, dest="error_every", default = None)
+    parser.add_option("--corrupt-every",
+                      help="Server sends a bad orderbook checksum every N messages", type=int, dest="corrupt_every", default = None)
+
+    (options, args) = parser.parse_args()
+
+    markets = options.markets.split(',')
+
+    server = FtxLocalServer(markets, rate = options.rate or None, seed = 0,
+                                reconnect_every = options.reconnect_every, error_every = options.error_every,
+                                corrupt_every = options.corrupt_every)
+    url = server.start()
+
+    client_class = instrumented(AsyncFtxWebsocketClient if options.use_asyncio else FtxWebsocketClient)
+    client = client_class(feed_endpoint = url, checksum_interval = options.checksum_interval, decoder = options.decoder)
+    client.subscribe_many(markets, ['orderbook', 'ticker', 'trades'])
+
+    time.sleep(options.duration)
+
+    handled = len(client.handler_latencies)
+    server_stats = server.get_stats()
+    feed_stats = client.get_feed_stats()
+    checksum_stats = feed_stats['checksums']
+
+    server.stop()
+
+    print(f'{client_class.__bases__[0].__name__} @ {options.rate or "unlimited"} msgs/sec over {len(markets)} markets')
+    print(f'{"sent":<25} {server_stats["sent"]:>12,}')
+    print(f'{"handled":<25} {handled:>12,}  ({handled / options.duration:,.0f} msgs/sec)')
+    report('handler latency', client.handler_latencies)
+    report('end-to-end latency', client.e2e_latencies)
+    print(f'{"books reset (checksum)":<25} {checksum_stats["failed"]:>12,}  '
+            f'(of {checksum_stats["verified"] + checksum_stats["failed"]:,} verified)')
+    print(f'{"reconnects":<25} {feed_stats["reconnects"]:>12,}  (server connections: {server_stats["connections"]:,})')
+    print(f'{"error frames":<25} {client.errors:>12,}')
@@ -0,0 +1,154 @@
+##########################
+#
+# Benchmarks FtxWebsocketClient message handling throughput (messages / sec)
+#   - the baseline: json.loads and an if / elif chain over channels, as _on_message
+#     did before decoders were pluggable, in front of the same handlers
+#   - for each installed JSON decoder: decoding alone, then full decode + dispatch + handling,
+#     with the speedup over the baseline
+#
+# The corpus is a file of raw websocket frames, one per line.  Without one, a synthetic
+# FTX feed with valid orderbook checksums is generated.
+##########################
+
+import sys
+import json
+from optparse import OptionParser
+
+from typing import Callable, List, Optional
+import time
+
+from cryptomancer.exchange_feed.replay_exchange_feed import ReplayWebsocketClient
+from cryptomancer.exchange_feed.ftx_synthetic_feed import FtxSyntheticFeed
+from cryptomancer.exchange_feed.decoders import available_decoders, get_decoder
+
+
+class BaselineWebsocketClient(ReplayWebsocketClient):
+    """
+        Decodes and dispatches frames the way FtxWebsocketClient did before decoders were
+        pluggable; everything after dispatch is unchanged, so only that difference is measured.
+    """
+    def _on_message(self, ws, raw_message):
+        received_at = time.time()
+
+        message = json.loads(raw_message)
+
+        message_type = message['type']
+
+        if message_type in {'subscribed', 'unsubscribed'}:
+            return
+
+        elif message_type == 'info':
+            if message['code'] == 20001:
+                return self.reconnect()
+
+        elif message_type == 'error':
+            raise Exception(message)
+
+        channel = message['channel']
+
+        if channel == 'orderbook':
+            self._handle_orderbook_message(message)
+
+        elif channel == 'trades':
+            self._handle_trades_message(message)
+
+        elif channel == 'ticker':
+            self._handle_ticker_message(message)
+
+        elif channel == 'fills':
+            self._handle_fills_message(message)
+
+        elif channel == 'orders':
+            self._handle_orders_message(message)
+
+        else:
+            return
+
+        self._record_feed_stats(message, received_at)
+
+
+def load_corpus(path: str) -> List[bytes]:
+    with open(path, 'rb') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run(label: str, f: Callable, items: List, baseline: Optional[float] = None, repeat: int = 1,
+            setup: Optional[Callable[[], Callable]] = None) -> float:
+    # best of `repeat` runs, so that warm up and noise do not decide the comparison;
+    # `setup`, if given, makes a fresh `f` for each run
+    rate = 0.
+    for _ in range(repeat):
+        if setup is not None:
+            f = setup()
+
+        start = time.perf_counter()
+        for item in items:
+            f(item)
+        elapsed = time.perf_counter() - start
+
+        rate = max(rate, len(items) / elapsed)
+
+    speedup = f'  ({rate / baseline:.2f}x baseline)' if baseline else ''
+    print(f'{label:<45} {rate:>14,.0f} msgs/sec{speedup}')
+    return rate
+
+
+def run_client(label: str, create_client: Callable[[], ReplayWebsocketClient], markets: List[str],
+                frames: List[bytes], baseline: Optional[float] = None, repeat: int = 1) -> float:
+    clients = []
+
+    def setup() -> Callable:
+        client = create_client()
+        client.subscribe_many(markets, ['orderbook', 'ticker', 'trades'])
+        clients.append(client)
+        return lambda frame: client._on_message(None, frame)
+
+    rate = run(label, None, frames, baseline, repeat, setup)
+
+    stats = clients[-1].get_checksum_stats()
+    print(f'{"":<45} checksums: {stats["verified"]:,} verified, {stats["failed"]:,} failed, {stats["skipped"]:,} skipped')
+    return rate
+
+
+if __name__ == '__main__':
+    usage = "usage: " + sys.argv[0] + " [optional-args]"
+    parser = OptionParser(usage = usage)
+
+    parser.add_option("-c", "--corpus",
+                      help="File of captured raw frames, one per line", type=str, dest="corpus", default = None)
+    parser.add_option("-n", "--messages",
+                      help="Number of synthetic messages to generate", type=int, dest="messages", default = 100000)
+    parser.add_option("-m", "--markets",
+                      help="Comma separated synthetic markets", type=str, dest="markets", default = "BTC-PERP,ETH-PERP,SOL-PERP")
+    parser.add_option("-r", "--repeat",
+                      help="Runs per measurement; the best is reported", type=int, dest="repeat", default = 3)
+    parser.add_option("-i", "--checksum-interval",
+                      help="Verify every Nth orderbook checksum", type=int, dest="checksum_interval", default = 1)
+
+    (options, args) = parser.parse_args()
+
+    if options.corpus:
+        frames = load_corpus(options.corpus)
+    else:
+        feed = FtxSyntheticFeed(options.markets.split(','), seed = 0)
+        frames = [frame.encode() for frame in feed.frames(options.messages)]
+
+    decode = get_decoder('json')
+    messages = [decode(frame) for frame in frames]
+    markets = sorted({message['market'] for message in messages if 'market' in message})
+
+    print(f'{len(frames):,} frames over {len(markets)} markets')
+
+    repeat = options.repeat
+    checksum_interval = options.checksum_interval
+
+    baseline_decode = run('[baseline] json.loads', json.loads, frames, repeat = repeat)
+    baseline = run_client('[baseline] json.loads + if/elif + handle',
+                            lambda: BaselineWebsocketClient(checksum_interval = checksum_interval),
+                            markets, frames, repeat = repeat)
+
+    for decoder in available_decoders():
+        run(f'[{decoder}] decode', get_decoder(decoder), frames, baseline_decode, repeat)
+        run_client(f'[{decoder}] decode + handle',
+                    lambda: ReplayWebsocketClient(decoder = decoder, checksum_interval = checksum_interval),
+                    markets, frames, baseline, repeat)
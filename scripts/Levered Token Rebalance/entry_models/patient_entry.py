@@ -10,36 +10,42 @@ locale.setlocale( locale.LC_ALL, '' )
 
 from cryptomancer.account.ftx_account import FtxAccount
 from cryptomancer.exchange_feed.ftx_exchange_feed import FtxExchangeFeed
+from cryptomancer.exchange_feed.shared_memory_feed import SharedMemoryExchangeFeed
 from cryptomancer.execution_handler.execution_session import execution_scope
 from cryptomancer.execution_handler.limit_order import LimitOrder
 from cryptomancer.execution_handler.auto_limit_order import AutoLimitOrder
 
-from typing import Tuple
+from typing import Optional, Tuple
 
 def patient_entry(account_name: str, base: str, underlying: str, dollar_target: float, 
-                    side: str, timeout: float, min_trade_size: float) -> Tuple[float, float]:
+                    side: str, timeout: float, min_trade_size: float,
+                    feed_name: Optional[str] = None) -> Tuple[float, float]:
     """
     This function seeks to buy/sell (`side`) `dollar_target` of `underlying` with posted limit orders to
         avoid taker fees.  The trade is for account `account_name`.
     
         - Uses current bid/ask spread to create the posted limit order and then wait `timeout` seconds before cancelling.
         - If after 5 retries no fills have occurred, attempts a limit order _above_ the mid-point.
+
+    If `feed_name` is given, market data is read from the feed published under that name
+    (see `SharedMemoryPublisher`) instead of opening a new connection.  The published feed
+    carries no order updates, so orders are then not attached to it.
     """
 
     account = FtxAccount(account_name)
-    exchange_feed = FtxExchangeFeed(account_name)
+    if feed_name is not None:
+        exchange_feed = SharedMemoryExchangeFeed(feed_name)
+        order_feed = None
+    else:
+        exchange_feed = FtxExchangeFeed(account_name)
+        order_feed = exchange_feed
 
     logger.debug(f'{base} | Subscribing to market feed.')
     _ = exchange_feed.get_ticker(underlying)
-    # need to let the subscription go through before we proceed
-    while True:
-        market = exchange_feed.get_ticker(underlying)
-        # make sure it's not an empty dict
-        # could also do `if not market`, but that
-        # seems like ugly code
-        if len(market) != 0:
-            break
-        time.sleep(0.1)
+    # need to let the subscription go through before we proceed;
+    # the ticker is an empty dict until the first update arrives
+    while len(exchange_feed.get_ticker(underlying)) == 0:
+        exchange_feed.wait_for_update(underlying, 'ticker', after_seq = 0, timeout = 1)
         
     logger.debug(f'{base} | Subscribed.')
 
@@ -65,6 +71,7 @@ def patient_entry(account_name: str, base: str, underlying: str, dollar_target:
                                                     side = side,
                                                     size = size,
                                                     price = limit_price,
+                                                    exchange_feed = order_feed,
                                                     post_only = True)
                     session.add(underlying_order)
             
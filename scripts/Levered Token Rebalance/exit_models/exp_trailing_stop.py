@@ -12,6 +12,7 @@ import numpy
 
 from cryptomancer.account.ftx_account import FtxAccount
 from cryptomancer.exchange_feed.ftx_exchange_feed import FtxExchangeFeed
+from cryptomancer.exchange_feed.shared_memory_feed import SharedMemoryExchangeFeed
 from cryptomancer.execution_handler.execution_session import execution_scope
 from cryptomancer.execution_handler.market_order import MarketOrder
 
@@ -19,13 +20,23 @@ from typing import Optional, Tuple
 
 def exp_trailing_stop(account_name: str, base: str, underlying: str, size: float, side: str, entry_price: float,
                     shape_parameter: Optional[float] = 125, min_trailing_stop_width: Optional[float] = 0.00025,
-                    max_trailing_stop_width: Optional[float] = 0.01) -> Tuple[float, Optional[float]]:
+                    max_trailing_stop_width: Optional[float] = 0.01,
+                    feed_name: Optional[str] = None) -> Tuple[float, Optional[float]]:
 
     account = FtxAccount(account_name)
-    exchange_feed = FtxExchangeFeed(account_name)
+    # read from a published feed if there is one, rather than opening another connection;
+    # it only carries market data, so the order is then not attached to it
+    if feed_name is not None:
+        exchange_feed = SharedMemoryExchangeFeed(feed_name)
+        order_feed = None
+    else:
+        exchange_feed = FtxExchangeFeed(account_name)
+        order_feed = exchange_feed
 
     _ = exchange_feed.get_ticker(underlying)
-    time.sleep(3) # wait for the socket connection
+    # wait for the first ticker update
+    while len(exchange_feed.get_ticker(underlying)) == 0:
+        exchange_feed.wait_for_update(underlying, 'ticker', after_seq = 0, timeout = 1)
 
     # exponential decay shape for trailing stop
     # width = max_width * exp(-shape * return)
@@ -38,8 +49,11 @@ def exp_trailing_stop(account_name: str, base: str, underlying: str, size: float
 
     limit_level = None
 
-    t = 0
+    last_logged_at = time.time()
+    sequence = 0
     while True:
+        # react to every ticker update rather than polling
+        sequence = exchange_feed.wait_for_update(underlying, 'ticker', after_seq = sequence, timeout = 1)
         market = exchange_feed.get_ticker(underlying)
         mid_point = (market['bid'] + market['ask']) / 2.
 
@@ -69,9 +83,9 @@ def exp_trailing_stop(account_name: str, base: str, underlying: str, size: float
             else:
                 limit_level = mid_point * (1 + stop_width)
 
-        t = t + 1
         # every 30 seconds, report to the logs
-        if numpy.mod(t, 300) == 0:
+        if time.time() - last_logged_at >= 30:
+            last_logged_at = time.time()
             if side == 'sell':
                 logger.info(f'{base} | {locale.currency(mid_point, grouping = True)} > '
                                 f'{locale.currency(limit_level, grouping = True)} '
@@ -80,8 +94,6 @@ def exp_trailing_stop(account_name: str, base: str, underlying: str, size: float
                 logger.info(f'{base} | {locale.currency(mid_point, grouping = True)} < '
                                 f'{locale.currency(limit_level, grouping = True)} '
                                 f'({(mid_point / limit_level - 1):.4%})')
-
-        time.sleep(0.1)
         
     
     # should probably auto limit order this in a loop to avoid
@@ -92,6 +104,7 @@ def exp_trailing_stop(account_name: str, base: str, underlying: str, size: float
                                         market = underlying,
                                         side = side,
                                         size = size,
+                                        exchange_feed = order_feed,
                                         reduce_only = True)
         session.add(underlying_order)
 
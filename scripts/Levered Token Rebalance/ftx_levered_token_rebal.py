@@ -20,6 +20,8 @@ logger.add("logs/ftx_static_cash_and_carry_perpetual.log", rotation="100 MB")
 
 from cryptomancer.account.ftx_account import FtxAccount
 from cryptomancer.exchange_feed.ftx_exchange_feed import FtxExchangeFeed
+from cryptomancer.exchange_feed.shared_memory_feed import SharedMemoryPublisher
+import cryptomancer.exchange_feed.shared_memory_feed as shared_memory_feed
 from cryptomancer.execution_handler.execution_session import execution_scope
 from cryptomancer.execution_handler.market_order import MarketOrder
 from cryptomancer.execution_handler.limit_order import LimitOrder
@@ -29,10 +31,12 @@ from cryptomancer.execution_handler.auto_limit_order import AutoLimitOrder
 from entry_models.patient_entry import patient_entry
 
 from exit_models.trailing_stop import trailing_stop
+from exit_models.exp_trailing_stop import exp_trailing_stop
 from exit_models.take_profit import take_profit
 
 
-def run(base, proxy, account_name, dollar_target, volatility, min_trade_size):
+def run(base, proxy, account_name, dollar_target, volatility, min_trade_size, feed_name = None,
+        exit_model = 'trailing_stop'):
     """
     try:
         account = FtxAccount(account_name)
@@ -109,7 +113,8 @@ def run(base, proxy, account_name, dollar_target, volatility, min_trade_size):
                                         dollar_target = dollar_target, 
                                         side = side, 
                                         timeout = 5, 
-                                        min_trade_size = min_trade_size)
+                                        min_trade_size = min_trade_size,
+                                        feed_name = feed_name)
 
     total_fill = numpy.sum(fills)
     average_fill_price = numpy.dot(fills, fill_prices) / numpy.sum(fills)
@@ -135,6 +140,12 @@ def run(base, proxy, account_name, dollar_target, volatility, min_trade_size):
     size = abs(total_fill)
     side = 'sell' if underlying_to_rebal > 1e-8 else 'buy'
 
+    if exit_model == 'exp_trailing_stop':
+        # trail the market ourselves off the published feed, and exit the whole position
+        exp_trailing_stop(account_name, base, underlying, size, side, average_fill_price,
+                            feed_name = feed_name)
+        return
+
     market = ftx_client.get_market(underlying)
     mid_point = (market['bid'] + market['ask']) / 2.
     trail_value = mid_point * (volatility * 2)
@@ -151,6 +162,10 @@ def run(base, proxy, account_name, dollar_target, volatility, min_trade_size):
 if __name__ == '__main__':
     usage = "usage: " + sys.argv[0] + " <FTX Account Name> <Dollar Target>"
     parser = OptionParser(usage = usage)
+    parser.add_option("--exit-model", dest = "exit_model", default = "trailing_stop",
+                        choices = ["trailing_stop", "exp_trailing_stop"],
+                        help = "how to exit the position: exchange trailing stops, or an "
+                                "exponential trailing stop driven by the market data feed")
     (options, args) = parser.parse_args()
 
     if len(args) < 1:
@@ -209,11 +224,21 @@ if __name__ == '__main__':
         'XRP': 1000
     }
 
+    # one set of connections for every process: this process owns the feed and
+    # publishes it to shared memory, where each run() reads it
+    exchange_feed = FtxExchangeFeed(account_name)
+    publisher = SharedMemoryPublisher(exchange_feed, [underlying + '-PERP' for underlying in to_trade],
+                                        name = shared_memory_feed.feed_name(account_name))
+
     parameters = []
     for underlying in to_trade:
         parameters.append((underlying, proxy[underlying], 
                                 account_name, dollar_targets[underlying], 
-                                vol[underlying], min_size[underlying]))
+                                vol[underlying], min_size[underlying], publisher.name,
+                                options.exit_model))
     
-    #run(*parameters[0])
-    cryptomancer.parallel.lmap(run, parameters)
+    try:
+        #run(*parameters[0])
+        cryptomancer.parallel.lmap(run, parameters)
+    finally:
+        publisher.close()
@@ -88,19 +88,19 @@ if __name__ == '__main__':
         market = ftx_feed.get_ticker(underlying)
         if 'bid' in market.keys():
             break
-        time.sleep(1)
+        ftx_feed.wait_for_update(underlying, 'ticker', after_seq = 0, timeout = 1)
     else:
         raise Exception("Couldn't create exchange feed")
     
     ewma_alpha = 2. / (options.ewma_span + 1)
 
     logger.info(f'Calibrating initial volatility...')
-    trades = []
+    trades = numpy.empty(0)
+    trade_cursor = 0
     pbar = tqdm.tqdm(total = options.ewma_span)
     while len(trades) < options.ewma_span:
-        new_trades = ftx_feed.get_trades(underlying)
-        new_trades = [trade['price'] for trade in new_trades]
-        trades = trades + new_trades
+        new_trades, trade_cursor = ftx_feed.get_trades_array(underlying, since = trade_cursor)
+        trades = numpy.concatenate((trades, new_trades['price']))
         pbar.update(len(new_trades))
     
 
@@ -118,16 +118,18 @@ if __name__ == '__main__':
 
         logger.info(f'Current Exposure: {base_asset} {base_asset_amount} / {quote_asset} {quote_asset_amount}')
 
-        new_trades = ftx_feed.get_trades(underlying)
-        new_trades = [trade['price'] for trade in new_trades]
-        trades = trades + new_trades
-
-        if len(trades) > MAX_LIST_SIZE:
-            trades = trades[len(trades) - MAX_LIST_SIZE:]
-
-        # get px
-        market = ftx_feed.get_ticker(underlying)
-        px = (market['bid'] + market['ask']) / 2.
+        new_trades, trade_cursor = ftx_feed.get_trades_array(underlying, since = trade_cursor)
+        trades = numpy.concatenate((trades, new_trades['price']))[-MAX_LIST_SIZE:]
+
+        # get px: the book's microprice, which leans towards the side likely to trade next;
+        # fall back on the ticker mid if either side of the book is empty
+        analytics = ftx_feed.get_book_analytics(underlying)
+        if analytics is not None:
+            px = analytics.microprice
+            logger.info(f'Microprice {px:.2f} / imbalance {analytics.imbalance:+.3f} / pressure {analytics.pressure:+.3f}')
+        else:
+            market = ftx_feed.get_ticker(underlying)
+            px = (market['bid'] + market['ask']) / 2.
         
         base_value = px * base_asset_amount
         inventory_value = base_value + quote_asset_amount
@@ -171,7 +173,7 @@ if __name__ == '__main__':
         size_bid = size_ask = 0
         q_unadj = q / q_adjustment_factor
         
-        with execution_scope(wait = False) as session:
+        with execution_scope(wait = False, concurrent = True) as session:
             if r_bid < px:
                 size_bid = size if q_unadj < 0 else size * numpy.exp(size_shape * q_unadj)
 
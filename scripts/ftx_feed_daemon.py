@@ -0,0 +1,52 @@
+##########################
+#
+# Owns the FTX websocket connections for an account and publishes tickers and
+# top-of-book depth to shared memory until interrupted, so that any number of
+# strategy processes can read them through SharedMemoryExchangeFeed(<name>)
+# without opening connections of their own.
+#
+##########################
+
+import sys
+from optparse import OptionParser
+
+import time
+
+from loguru import logger
+logger.add("logs/ftx_feed_daemon.log", rotation="100 MB")
+
+from cryptomancer.exchange_feed.ftx_exchange_feed import FtxExchangeFeed
+from cryptomancer.exchange_feed.shared_memory_feed import SharedMemoryPublisher, feed_name
+
+
+if __name__ == '__main__':
+    usage = "usage: " + sys.argv[0] + " <Comma separated markets> [optional-args]"
+    parser = OptionParser(usage = usage)
+
+    parser.add_option("-a", "--account",
+                      help="FTX account name", type=str, dest="account_name", default = None)
+    parser.add_option("-n", "--name",
+                      help="Shared memory segment name (defaults to one per account)", type=str, dest="name", default = None)
+    parser.add_option("-d", "--depth",
+                      help="Order book levels published per side", type=int, dest="depth", default = 20)
+    parser.add_option("-s", "--stats-interval",
+                      help="Seconds between feed statistics log lines", type=float, dest="stats_interval", default = 60)
+
+    (options, args) = parser.parse_args()
+
+    if len(args) < 1:
+        print(usage)
+        exit()
+
+    markets = args[0].split(',')
+    name = options.name or feed_name(options.account_name)
+
+    exchange_feed = FtxExchangeFeed(options.account_name, stats_log_interval = options.stats_interval)
+
+    with SharedMemoryPublisher(exchange_feed, markets, name = name, depth = options.depth):
+        logger.info(f'Publishing {", ".join(markets)} to shared memory as {name}')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info('Stopped.')
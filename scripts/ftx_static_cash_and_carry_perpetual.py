@@ -93,6 +93,8 @@ def static_cash_and_carry(account: FtxAccount, exchange_feed: FtxExchangeFeed, u
                 mid_point = (market['bid'] + market['ask']) / 2.
                 width = (market['ask'] - market['bid']) / mid_point
             except:
+                # no ticker yet; wait for the first update instead of spinning
+                exchange_feed.wait_for_update(underlying_name, 'ticker', after_seq = 0, timeout = 1)
                 continue
 
             price = mid_point * (1 - width / 2) if side == 'buy' else mid_point * (1 + width / 2)
@@ -105,6 +107,7 @@ def static_cash_and_carry(account: FtxAccount, exchange_feed: FtxExchangeFeed, u
                                                     side = side,
                                                     size = size,
                                                     price = price,
+                                                    exchange_feed = exchange_feed,
                                                     post_only = True)
 
                     session.add(underlying_order)
@@ -174,6 +177,7 @@ def static_cash_and_carry(account: FtxAccount, exchange_feed: FtxExchangeFeed, u
                                         side = side,
                                         size = size,
                                         price = price,
+                                        exchange_feed = exchange_feed,
                                         post_only = True)
                 
                     session.add(perpetual_order)